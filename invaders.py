@@ -11,5 +11,5 @@ import sys
 from videogame import game
 
 if __name__ == "__main__":
-    instance = game.SpaceInvadersGame()
+    instance = game.SpaceInvadersGame(game.parse_args())
     sys.exit(instance.run())
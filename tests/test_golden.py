@@ -0,0 +1,29 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""The golden frames kept by an update, read back one at a time."""
+
+import pygame
+
+from videogame import golden
+
+
+def test_frames_read_back_as_written(tmp_path):
+    """Every frame kept comes back with the same pixels"""
+    path = tmp_path / golden.FRAMES
+    frames = []
+    writer = golden.FrameWriter(path)
+    for step in range(3):
+        frame = pygame.Surface((24, 16))
+        frame.fill((0, 255, 0), (step * 4, 2, 6, 5))
+        frame.set_at((23, step), (255, 255, 255))
+        writer.write(frame)
+        frames.append(pygame.image.tobytes(frame, "RGB"))
+    writer.close()
+
+    for index, pixels in enumerate(frames):
+        kept = golden.read_frame(path, index)
+        assert kept.get_size() == (24, 16)
+        assert pygame.image.tobytes(kept, "RGB") == pixels
+    assert golden.read_frame(path, len(frames)) is None
+    assert golden.read_frame(tmp_path / "missing.z", 0) is None
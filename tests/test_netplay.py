@@ -0,0 +1,91 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""A host and a client talking over loopback."""
+
+import time
+
+import pygame
+import pytest
+
+from videogame import netplay
+
+
+def wait_for(check, timeout=5.0):
+    """Call check until it returns something, or fail after timeout"""
+    give_up = time.monotonic() + timeout
+    while time.monotonic() < give_up:
+        result = check()
+        if result:
+            return result
+        time.sleep(0.001)
+    pytest.fail("nothing arrived over loopback")
+    return None
+
+
+@pytest.fixture(name="host")
+def fixture_host():
+    """A host on a free port of this machine, sending every frame"""
+    host = netplay.Host(0, interval=1)
+    yield host
+    host.close()
+
+
+def connect(host, role):
+    """Return a client of host once the host has heard its hello"""
+    client = netplay.Client(host.address, role)
+
+    def heard():
+        host.poll()
+        return host.clients and host.clients[-1].role == role
+
+    wait_for(heard)
+    return client
+
+
+def test_host_listens_only_on_this_machine(host):
+    """Without an address the host cannot be reached from elsewhere"""
+    assert host.address[0] in ("127.0.0.1", "::1")
+
+
+def test_states_reach_the_client(host):
+    """The first state is sent whole and the next ones as deltas"""
+    client = connect(host, netplay.SPECTATOR)
+    states = [b"state one" * 40, b"state two" * 40, b"state one, again"]
+    for state in states:
+        assert host.due()
+        host.send(state)
+        assert wait_for(client.poll) == state
+    assert client.frame == len(states)
+    client.close()
+
+
+def test_keys_reach_the_host(host):
+    """A joined player's keys come out of the host as key events, a
+    spectator's never leave"""
+    spectator = connect(host, netplay.SPECTATOR)
+    spectator.send_key(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a))
+    player = connect(host, netplay.PLAYER)
+    player.send_key(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    player.send_key(pygame.event.Event(pygame.KEYUP, key=pygame.K_SPACE))
+    # not one of the actions a joined player takes
+    player.send_key(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_F1))
+
+    events = []
+    wait_for(lambda: events.extend(host.poll()) or len(events) >= 2)
+    assert [(event.type, event.key) for event in events] == [
+        (pygame.KEYDOWN, pygame.K_SPACE), (pygame.KEYUP, pygame.K_SPACE)
+    ]
+    player.close()
+    spectator.close()
+
+
+def test_states_are_sent_every_interval():
+    """Only every interval-th frame is sent, and only with a client"""
+    host = netplay.Host(0, interval=3)
+    try:
+        assert not any(host.due() for _ in range(6))
+        connect(host, netplay.SPECTATOR).close()
+        assert [host.due() for _ in range(6)].count(True) == 2
+    finally:
+        host.close()
@@ -0,0 +1,94 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""The pacing governor, stepping the quality down and back up."""
+
+import pytest
+
+from videogame import pacing
+from videogame.particles import ParticleSystem
+from videogame.scene import Scene
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class FakeTime:
+    """Stands in for the time module, the test says how long work takes"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        """Return the time the test is at"""
+        return self.now
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class FakeClock:
+    """Stands in for the clock the governor wraps, it never waits"""
+
+    def __init__(self):
+        self.ticks = 0
+
+    # I know what I'm doing, linter.
+    # pylint: disable-next=unused-argument
+    def tick(self, framerate=0):
+        """Count the tick"""
+        self.ticks += 1
+        return 16
+
+
+@pytest.fixture(name="fake_time")
+def fixture_fake_time(monkeypatch):
+    """Time that only moves when the test says so, and the quality put
+    back the way it was after"""
+    fake = FakeTime()
+    monkeypatch.setattr(pacing, "time", fake)
+    yield fake
+    ParticleSystem.enabled = False
+    pacing.set_quality(0)
+
+
+def play(governor, fake_time, frames, work):
+    """Play frames that each take work seconds, return the levels the
+    governor stepped to"""
+    stepped = []
+    for _ in range(frames):
+        fake_time.now += work
+        before = governor.quality
+        governor.tick(60)
+        if governor.quality != before:
+            stepped.append(governor.quality)
+    return stepped
+
+
+def test_skips_debris_levels_without_debris(fake_time):
+    """Without debris the levels that only thin it are skipped"""
+    governor = pacing.Governor(FakeClock())
+    assert play(governor, fake_time, 1000, 0.020) == [3, 4, 5]
+    assert Scene.hud_interval == 8
+    assert Scene.color_gel is False
+    assert play(governor, fake_time, 2000, 0.001) == [4, 3, 0]
+    assert Scene.hud_interval == 1
+    assert Scene.color_gel is True
+
+
+def test_steps_every_level_with_debris(fake_time):
+    """With debris every level gives something up"""
+    ParticleSystem.enabled = True
+    governor = pacing.Governor(FakeClock())
+    assert play(governor, fake_time, 1000, 0.020) == [1, 2, 3, 4, 5]
+    assert ParticleSystem.density == 0.0
+    assert play(governor, fake_time, 2000, 0.001) == [4, 3, 2, 1, 0]
+    assert ParticleSystem.density == 1.0
+
+
+def test_frames_on_budget_keep_the_quality(fake_time):
+    """Frames that keep to their budget never step the quality"""
+    clock = FakeClock()
+    governor = pacing.Governor(clock)
+    assert not play(governor, fake_time, 600, 0.010)
+    assert governor.late == 0
+    assert clock.ticks == 600
+    assert "599 frames, 0 over budget" in governor.report()
@@ -0,0 +1,79 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Layers that are sent once and patched after, drawn by the presenter."""
+
+import pygame
+import pytest
+
+from videogame.render import DisplayList, Presenter
+
+
+@pytest.fixture(name="display")
+def fixture_display(monkeypatch):
+    """A display without a window, the presenter converts to its format"""
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    yield
+    pygame.display.quit()
+
+
+def layer(flags=0):
+    """Return a layer with a colorkey, or alpha, and a square on it"""
+    surf = pygame.Surface((16, 16), flags)
+    if flags & pygame.SRCALPHA:
+        surf.fill((0, 0, 0, 0))
+    else:
+        surf.set_colorkey((0, 0, 0))
+    surf.fill((200, 40, 40, 255), (2, 2, 4, 4))
+    return surf
+
+
+def change(surf):
+    """Move the square and return the rect that changed"""
+    surf.fill((0, 0, 0, 0), (2, 2, 4, 4))
+    surf.fill((40, 200, 40, 128), (8, 9, 5, 3))
+    return pygame.Rect(2, 2, 11, 10)
+
+
+@pytest.mark.parametrize("flags", [0, pygame.SRCALPHA])
+@pytest.mark.parametrize("scale", [1, 3])
+# I know what I'm doing, linter.
+# pylint: disable-next=unused-argument
+def test_patched_layer_draws_like_the_surface(display, flags, scale):
+    """A layer sent once and then patched looks like the layer itself"""
+    source = layer(flags)
+    screen = pygame.Surface((16 * scale, 16 * scale))
+    display_list = DisplayList((16, 16))
+    presenter = Presenter(screen, scale)
+
+    display_list.blit(source, (0, 0))
+    presenter.draw(display_list.snapshot(1))
+    display_list.update(source, change(source))
+    display_list.fill((0, 0, 255))
+    display_list.blit(source, (0, 0))
+    snapshot = display_list.snapshot(2)
+    assert not snapshot.uploads
+    assert len(snapshot.patches[0][1]) < len(pygame.image.tobytes(
+        source, snapshot.patches[0][3]
+    ))
+    presenter.draw(snapshot)
+
+    expected = pygame.Surface((16, 16))
+    expected.fill((0, 0, 255))
+    expected.blit(source, (0, 0))
+    expected = pygame.transform.scale_by(expected, scale)
+    assert (pygame.image.tobytes(screen, 'RGB')
+            == pygame.image.tobytes(expected, 'RGB'))
+
+
+def test_layer_never_drawn_is_sent_whole():
+    """Changes to a layer that was never drawn are sent with it"""
+    source = layer()
+    display_list = DisplayList((16, 16))
+    display_list.update(source, change(source))
+    display_list.blit(source, (0, 0))
+    snapshot = display_list.snapshot(1)
+    assert not snapshot.patches
+    assert len(snapshot.uploads) == 1
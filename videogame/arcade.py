@@ -0,0 +1,112 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Many games at once in one window, like a wall of cabinets.
+
+Every session is its own InvadersGameScene drawing onto a subsurface of
+the window, and every session is stepped every frame, so each game runs
+at the full frame rate. Images, glyphs and sounds are loaded once per
+process by the asset caches, so another session only costs its own
+scene state and the time it takes to step. A wall with more sessions
+than fit in a frame slows down as a whole, the report says how often.
+"""
+
+import time
+
+import pygame
+
+from videogame.autopilot import Autopilot
+from videogame.controls import InputState
+from videogame.scene import InvadersGameScene
+from videogame.sound import Sound
+
+# size of one game
+SESSION_SIZE = (224, 256)
+# how much a new measurement moves the cost of a session
+COST_WEIGHT = 0.1
+# seconds of a frame stepping the sessions may take, the rest is left
+# for presenting
+BUDGET = 0.75 / 60
+
+
+class Session:
+    """One game of the arcade and what it costs to step"""
+
+    def __init__(self, surf: pygame.Surface):
+        self.surf = surf
+        self.scene = None
+        self.autopilot = None
+        self.input = None
+        self.new_game()
+        # seconds a step takes, on average
+        self.cost = 0.0
+        self.steps = 0
+
+    def step(self):
+        """Play one frame of the session, starting a new game once
+        the last one is over"""
+        start = time.perf_counter()
+        self.scene.handle_input(self.input.update(self.autopilot.events()))
+        self.scene.update_scene()
+        self.scene.draw()
+        self.scene.render_updates()
+        if not self.scene.is_valid():
+            self.new_game()
+        self.steps += 1
+        self.cost += (time.perf_counter() - start - self.cost) * COST_WEIGHT
+
+    def new_game(self):
+        """Start a game with an autopilot that has no keys down yet"""
+        self.scene = InvadersGameScene(self.surf)
+        self.autopilot = Autopilot(self.scene)
+        self.input = InputState(keyboard=False)
+
+
+class Arcade:
+    """Steps a grid of sessions, all of them every frame"""
+
+    def __init__(self, screen: pygame.Surface, columns, rows):
+        self.sessions = []
+        width, height = SESSION_SIZE
+        for row in range(rows):
+            for column in range(columns):
+                surf = screen.subsurface(
+                    (column * width, row * height, width, height)
+                )
+                self.sessions.append(Session(surf))
+        self.columns = columns
+        # the session that is heard
+        self.focus = 0
+        # frames stepped, and those whose steps ran over the budget
+        self.frames = 0
+        self.late = 0
+
+    def process_event(self, event):
+        """Click a session to hear it"""
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            column = event.pos[0] // SESSION_SIZE[0]
+            row = event.pos[1] // SESSION_SIZE[1]
+            index = row * self.columns + column
+            if 0 <= index < len(self.sessions):
+                self.focus = index
+
+    def step(self):
+        """Step every session one frame"""
+        start = time.perf_counter()
+        for index, session in enumerate(self.sessions):
+            Sound.muted = index != self.focus
+            session.step()
+        Sound.muted = False
+        self.frames += 1
+        self.late += time.perf_counter() - start > BUDGET
+
+    def report(self):
+        """Return how each session fared as text"""
+        return '\n'.join([
+            f"session {index:>2}: {session.steps} steps, "
+            f"{session.cost * 1000:.2f} ms"
+            for index, session in enumerate(self.sessions)
+        ] + [
+            f"{self.late} of {self.frames} frames took longer than "
+            f"{BUDGET * 1000:.1f} ms to step, fewer sessions keep to 60 fps"
+        ])
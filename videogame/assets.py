@@ -0,0 +1,208 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Packed asset bundle for sprite sheets and sound effects.
+
+Every png and wav in the data directory can be pre-decoded into a single
+file (raw RGB pixels and raw PCM samples) with:
+
+    python -m videogame.assets
+
+At runtime the pack is memory-mapped once and its regions are wrapped as
+surfaces and mixer sounds, so no png or wav has to be opened or parsed.
+Loose files are still used when the pack is missing, and in place of
+any packed asset whose file changed since the pack was built, with a
+warning to rebuild the pack.
+"""
+
+import functools
+import mmap
+import os
+import struct
+import sys
+import warnings
+
+import pygame
+
+from videogame import indexed
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+PACK_PATH = os.path.join(DATA_DIR, 'assets.pak')
+
+PACK_MAGIC = b'SIPK'
+PACK_VERSION = 2
+
+# magic, version, entry count
+_HEADER = struct.Struct('<4sHH')
+# name, kind, channels, sample format, width or frequency, height,
+# offset into the pack, length of the region, and the modification time
+# in nanoseconds and size of the file it was packed from
+_ENTRY = struct.Struct('<32sBBhIIQQqQ')
+_ALIGN = 16
+
+KIND_IMAGE = 0
+KIND_SOUND = 1
+
+
+class AssetPack:
+    """Read-only view over a memory-mapped asset pack."""
+
+    def __init__(self, path=PACK_PATH):
+        with open(path, 'rb') as file_handle:
+            self._map = mmap.mmap(
+                file_handle.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        self._view = memoryview(self._map)
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{path} is not a version {PACK_VERSION} pack")
+
+        self._entries = {}
+        for i in range(count):
+            entry = _ENTRY.unpack_from(
+                self._map, _HEADER.size + i * _ENTRY.size
+            )
+            self._entries[entry[0].rstrip(b'\0').decode()] = entry[1:]
+
+    def __contains__(self, filename):
+        return filename in self._entries
+
+    def _entry(self, filename, kind):
+        """Return the entry of filename if it is packed as kind and its
+        file has not changed since, a file that is gone is fine"""
+        entry = self._entries.get(filename)
+        if entry is None or entry[0] != kind:
+            return None
+        try:
+            stat = os.stat(os.path.join(DATA_DIR, filename))
+        except FileNotFoundError:
+            return entry
+        if (stat.st_mtime_ns, stat.st_size) != entry[-2:]:
+            warnings.warn(
+                f"{filename} changed since the asset pack was built, "
+                f"loading the file instead. Rebuild the pack with "
+                f"python -m videogame.assets", RuntimeWarning
+            )
+            return None
+        return entry
+
+    def image(self, filename):
+        """Wrap a packed sheet as a surface, None if it is not packed
+        or is out of date"""
+        entry = self._entry(filename, KIND_IMAGE)
+        if entry is None:
+            return None
+        _, _, _, width, height, offset, length, _, _ = entry
+        return pygame.image.frombuffer(
+            self._view[offset:offset+length], (width, height), 'RGB'
+        )
+
+    def sound(self, filename):
+        """Wrap packed PCM as a mixer sound, None if it cannot be used.
+        The samples are only usable if the mixer runs at the same
+        format they were decoded to."""
+        entry = self._entry(filename, KIND_SOUND)
+        if entry is None:
+            return None
+        _, channels, sample_format, frequency, _, offset, length, _, _ = \
+            entry
+        if pygame.mixer.get_init() != (frequency, sample_format, channels):
+            return None
+        return pygame.mixer.Sound(buffer=self._view[offset:offset+length])
+
+
+@functools.lru_cache(maxsize=None)
+def asset_pack():
+    """Return the shared asset pack, None if there is no usable pack"""
+    try:
+        return AssetPack()
+    except (OSError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def load_image(filename):
+    """Return the sheet for filename converted to the display format,
+    or 8-bit with indexed color, with black as the transparent color.
+    Sheets are shared, so callers must not draw onto them."""
+    pack = asset_pack()
+    sheet = pack.image(filename) if pack else None
+    if sheet is None:
+        sheet = pygame.image.load(os.path.join(DATA_DIR, filename))
+    if indexed.enabled:
+        sheet = indexed.convert(sheet)
+    elif pygame.display.get_surface() is not None:
+        sheet = sheet.convert()
+    else:
+        # the texture backend has no display surface to match
+        sheet = sheet.convert(32)
+    sheet.set_colorkey([0, 0, 0])
+    return sheet
+
+
+@functools.lru_cache(maxsize=None)
+def load_sound(filename):
+    """Return the shared mixer sound for filename"""
+    pack = asset_pack()
+    sound = pack.sound(filename) if pack else None
+    if sound is None:
+        sound = pygame.mixer.Sound(os.path.join(DATA_DIR, filename))
+    return sound
+
+
+def _decode(filepath):
+    """Return the kind, channels, sample format, width or frequency and
+    height of a png or wav, and its raw pixels or samples"""
+    if filepath.endswith('.png'):
+        image = pygame.image.load(filepath)
+        return (KIND_IMAGE, 0, 0, *image.get_size()), \
+            pygame.image.tobytes(image, 'RGB')
+    frequency, sample_format, channels = pygame.mixer.get_init()
+    return (KIND_SOUND, channels, sample_format, frequency, 0), \
+        pygame.mixer.Sound(filepath).get_raw()
+
+
+def build_pack(path=PACK_PATH):
+    """Decode every png and wav in the data directory into one pack"""
+    names = sorted(
+        name for name in os.listdir(DATA_DIR)
+        if name.endswith(('.png', '.wav'))
+    )
+
+    entries = []
+    regions = []
+    offset = _HEADER.size + len(names) * _ENTRY.size
+    for name in names:
+        offset += -offset % _ALIGN
+        filepath = os.path.join(DATA_DIR, name)
+        entry, data = _decode(filepath)
+        stat = os.stat(filepath)
+        entries.append(_ENTRY.pack(
+            name.encode(), *entry, offset, len(data),
+            stat.st_mtime_ns, stat.st_size
+        ))
+        regions.append((offset, data))
+        offset += len(data)
+
+    with open(path, 'wb') as file_handle:
+        file_handle.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(names)))
+        file_handle.write(b''.join(entries))
+        for region_offset, data in regions:
+            file_handle.write(b'\0' * (region_offset - file_handle.tell()))
+            file_handle.write(data)
+    return names
+
+
+def main():
+    """Build the asset pack from the command line"""
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.mixer.init()
+    path = sys.argv[1] if len(sys.argv) > 1 else PACK_PATH
+    names = build_pack(path)
+    print(f"Packed {len(names)} assets into {path}")
+    pygame.mixer.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""A player for demos that reads the game state instead of the screen.
+
+Each frame it looks at where the cannon is, the lowest alien of the
+column it is after and the alien bullets close to the ground, and
+turns that into the key presses a person would make. The target is
+only picked again every few frames, so a frame costs a few attribute
+reads and comparisons.
+"""
+
+import pygame
+
+# frames between picking a new column to go after
+RETARGET_FRAMES = 8
+# alien bullets below this line are worth dodging
+DANGER_LINE = 168
+# how far beside the cannon an alien bullet still counts as a threat
+DANGER_MARGIN = 6
+# the cannon is 16 pixels wide, its shots leave from its middle
+CANNON_WIDTH = 16
+# how far the cannon can go either way
+LEFT_WALL = 16
+RIGHT_WALL = 224 - CANNON_WIDTH * 2
+
+
+class Autopilot:
+    """Plays an InvadersGameScene through key events"""
+
+    def __init__(self, scene):
+        self._scene = scene
+        self._frames = 0
+        # position_x the cannon is heading for
+        self._target = None
+        # the direction key and fire key held down
+        self._held = None
+        self._firing = False
+
+    def events(self):
+        """Return the key events of the next frame"""
+        scene = self._scene
+        self._frames += 1
+        if scene.loading or scene.player.explode_frame:
+            return self.release()
+
+        if self._target is None or self._frames % RETARGET_FRAMES == 0:
+            self._target = self._pick_target()
+        cannon = scene.player.position_x
+
+        direction = None
+        threat = self._threat(cannon)
+        if threat is not None:
+            # step out from under it, away from it unless at a wall
+            direction = pygame.K_RIGHT
+            if threat > cannon + CANNON_WIDTH // 2:
+                direction = pygame.K_LEFT
+            if cannon <= LEFT_WALL:
+                direction = pygame.K_RIGHT
+            elif cannon >= RIGHT_WALL:
+                direction = pygame.K_LEFT
+        elif self._target is not None and self._target != cannon:
+            direction = (
+                pygame.K_LEFT if self._target < cannon else pygame.K_RIGHT
+            )
+
+        aimed = self._target is not None and abs(self._target - cannon) <= 2
+        ready = not any(bullet.is_player_owned for bullet in scene.bullets)
+        # the fire key has to come up to be pressed again
+        fire = aimed and ready and not self._firing
+        return self._press(direction, fire)
+
+    def release(self):
+        """Return the key events that let go of every key held down"""
+        return self._press(None, False)
+
+    def _pick_target(self):
+        """Return the cannon position under the lowest alien of the
+        closest column that still has aliens"""
+        lowest = {}
+        for row in self._scene.aliens:
+            for alien in row:
+                if alien.is_alive:
+                    column = alien.grid_position[0]
+                    if (column not in lowest
+                            or alien.position[1] > lowest[column][1]):
+                        lowest[column] = alien.position
+        if not lowest:
+            return None
+        cannon = self._scene.player.position_x
+        return min(
+            (position[0] for position in lowest.values()),
+            key=lambda x: abs(x - cannon)
+        )
+
+    def _threat(self, cannon):
+        """Return the x of the closest alien bullet about to land on
+        the cannon, or None"""
+        threats = [
+            bullet.position[0] for bullet in self._scene.bullets
+            if not bullet.is_player_owned
+            and bullet.position[1] > DANGER_LINE
+            and cannon - DANGER_MARGIN
+            <= bullet.position[0] <= cannon + CANNON_WIDTH + DANGER_MARGIN
+        ]
+        if not threats:
+            return None
+        return min(threats, key=lambda x: abs(x - cannon))
+
+    def _press(self, direction, fire):
+        """Return the key events that get from the keys held down now
+        to holding direction, and tapping fire"""
+        events = []
+        if direction != self._held:
+            if self._held is not None:
+                events.append(
+                    pygame.event.Event(pygame.KEYUP, key=self._held)
+                )
+            if direction is not None:
+                events.append(
+                    pygame.event.Event(pygame.KEYDOWN, key=direction)
+                )
+            self._held = direction
+        if fire:
+            events.append(
+                pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)
+            )
+        elif self._firing:
+            events.append(
+                pygame.event.Event(pygame.KEYUP, key=pygame.K_SPACE)
+            )
+        self._firing = fire
+        return events
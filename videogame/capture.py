@@ -0,0 +1,117 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Recording of the frames of a session, written on a background thread."""
+
+import queue
+import shlex
+import subprocess
+import threading
+
+import numpy
+import pygame
+
+# frames that can wait for the writer before new ones are dropped
+SLOTS = 8
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class FrameCapture:
+    """Copies every presented frame into a ring of preallocated buffers
+    and streams them as raw RGB from a writer thread.
+
+    The game loop only ever copies pixels into a free buffer. When the
+    writer is so far behind that no buffer is free, the frame is
+    dropped and counted instead of waiting for it.
+    """
+
+    def __init__(self, output, size, slots=SLOTS):
+        """Open output, a file name, or a command that is given the
+        frames on its standard input when it starts with a pipe"""
+        self.size = size
+        self.captured = 0
+        self.dropped = 0
+        self.error = None
+        self._process = None
+        if output.startswith('|'):
+            # pylint: disable-next=consider-using-with
+            self._process = subprocess.Popen(
+                shlex.split(output[1:]), stdin=subprocess.PIPE
+            )
+            self._file = self._process.stdin
+        else:
+            # pylint: disable-next=consider-using-with
+            self._file = open(output, 'wb')
+        width, height = size
+        # rows of 32 bit pixels in the format of the captured surface,
+        # and where red, green and blue are in them
+        self._buffers = [
+            numpy.empty((height, width), numpy.uint32) for _ in range(slots)
+        ]
+        self._shifts = [(16, 8, 0)] * slots
+        # rows of RGB pixels, the layout of a raw video frame
+        self._rgb = numpy.empty((height, width, 3), numpy.uint8)
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._filled = queue.Queue()
+        self._writer = threading.Thread(
+            target=self._write, name="capture", daemon=True
+        )
+        self._writer.start()
+
+    def grab(self, surf: pygame.Surface):
+        """Copy the pixels of surf for the writer, or drop them if every
+        buffer is taken. A surf that is a whole number of times larger
+        than the capture is sampled down to it."""
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return
+        step = surf.get_width() // self.size[0]
+        # whole pixels are copied as they are, splitting them into RGB
+        # is many times slower and is left to the writer
+        pixels = pygame.surfarray.pixels2d(surf)
+        numpy.copyto(self._buffers[slot], pixels[::step, ::step].T)
+        # unlocks surf
+        del pixels
+        self._shifts[slot] = surf.get_shifts()[:3]
+        self.captured += 1
+        self._filled.put(slot)
+
+    def close(self):
+        """Write the frames still waiting and close the output"""
+        self._filled.put(None)
+        self._writer.join()
+        try:
+            self._file.close()
+        except BrokenPipeError:
+            pass
+        if self._process is not None:
+            self._process.wait()
+        print(
+            f"Captured {self.captured} frames of {self.size[0]}x"
+            f"{self.size[1]} RGB, dropped {self.dropped}"
+        )
+        if self.error is not None:
+            print(f"Capture stopped early: {self.error}")
+
+    def _write(self):
+        """Write filled buffers out in order until closed"""
+        while True:
+            slot = self._filled.get()
+            if slot is None:
+                return
+            if self.error is None:
+                pixels = self._buffers[slot]
+                for channel, shift in enumerate(self._shifts[slot]):
+                    self._rgb[:, :, channel] = pixels >> shift
+                try:
+                    self._file.write(self._rgb.data)
+                except OSError as error:
+                    # the encoder went away, frames are thrown out from
+                    # now on so the game keeps going
+                    self.error = error
+            self._free.put(slot)
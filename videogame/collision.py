@@ -0,0 +1,85 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Collision tests between sprites, boxes first and pixels last.
+
+A sprite that moved is tested along the whole way it went this frame,
+so one that moves further than it is tall cannot step over something
+thin, whatever its speed or however many frames are run to catch up.
+The box around the way it went rules out nearly every pair, the pixels
+are only compared for the few pairs whose boxes meet.
+"""
+
+import functools
+
+import pygame
+
+
+@functools.lru_cache(maxsize=256)
+def frame_mask(sheet: pygame.Surface, area):
+    """Return the mask of the area of sheet, made once per frame of a
+    sheet. Sheets are never drawn on once loaded, a damaged shield gets
+    a new one, so a mask never goes stale."""
+    rect = pygame.Rect(area).clip(sheet.get_rect())
+    return pygame.mask.from_surface(sheet.subsurface(rect))
+
+
+def contact(mover, start, target, target_start=None):
+    """Return where mover touches target on its way from start to its
+    position now, or None if it never does. target may have moved too,
+    from target_start.
+
+    Where mover ended up is tried first, so anything slower than its own
+    size is found at the same place as if only the end was tested. Only
+    when that misses are the points in between tried, in order."""
+    end = mover.position
+    target_end = target.position
+    if target_start is None:
+        target_start = target_end
+
+    # the boxes around the ways both went, which is all most pairs need
+    if _apart(
+        (start[0], end[0]), mover.rect.width,
+        (target_start[0], target_end[0]), target.rect.width
+    ) or _apart(
+        (start[1], end[1]), mover.rect.height,
+        (target_start[1], target_end[1]), target.rect.height
+    ):
+        return None
+
+    mask = frame_mask(mover.sheet, tuple(mover.rect))
+    target_mask = frame_mask(target.sheet, tuple(target.rect))
+
+    # one step for every pixel they moved closer or apart
+    steps = max(
+        abs(end[0] - start[0] - target_end[0] + target_start[0]),
+        abs(end[1] - start[1] - target_end[1] + target_start[1])
+    )
+    for step in (steps, *range(1, steps)) if steps else (0,):
+        position = _between(start, end, step, steps)
+        target_position = _between(target_start, target_end, step, steps)
+        if mask.overlap(target_mask, (
+            target_position[0] - position[0],
+            target_position[1] - position[1]
+        )):
+            return position
+    return None
+
+
+def _apart(way, length, target_way, target_length):
+    """Return True if two things going from one end of their way to the
+    other along a line are never within reach of each other"""
+    return (
+        min(way) >= max(target_way) + target_length
+        or min(target_way) >= max(way) + length
+    )
+
+
+def _between(start, end, step, steps):
+    """Return the point step steps of steps along from start to end"""
+    if steps == 0:
+        return end
+    return (
+        start[0] + (end[0] - start[0]) * step // steps,
+        start[1] + (end[1] - start[1]) * step // steps
+    )
@@ -0,0 +1,147 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""What the player is doing, once a frame, instead of a stream of events.
+
+Keys are bound to actions, left, right, fire and so on, and every frame
+the input state is worked out into the actions held down, and the ones
+pressed or let go of since the last frame. Scenes only ever look at
+that, so they do not care which key did it, or whether a person, the
+demo's autopilot or the player joined over the network pressed it.
+
+What is held comes from SDL's keyboard state, and from the key events
+of the frame for keys nobody pressed on the keyboard, the autopilot and
+the soak test post their own. A key pressed and let go of within one
+frame still counts as pressed, where reading the state alone would
+miss it.
+
+The queue only takes in the events something reads, and the window
+events that call for a redraw, so mouse motion, text input and the
+like are dropped by SDL instead of being taken off the queue and thrown
+away every frame.
+"""
+
+import collections
+
+import pygame
+
+# the only events the game reads
+EVENT_TYPES = (
+    pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN
+)
+# window events that mean the window has to be drawn again, let through
+# so that they wake a game resting on a still scene
+WINDOW_EVENTS = (
+    pygame.WINDOWEXPOSED, pygame.WINDOWRESIZED, pygame.WINDOWSIZECHANGED,
+    pygame.WINDOWSHOWN, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE,
+    pygame.VIDEORESIZE,
+)
+
+# the keys of each action, the first is what gets sent over the network
+DEFAULT_BINDINGS = {
+    "left": (pygame.K_a, pygame.K_LEFT),
+    "right": (pygame.K_d, pygame.K_RIGHT),
+    "fire": (pygame.K_SPACE,),
+    "toggle": (pygame.K_RETURN,),
+    "rewind": (pygame.K_BACKSPACE,),
+    # not on the controls screen, profiles the scene on a cabinet
+    "profile": (pygame.K_F12,),
+}
+
+# actions held down, pressed this frame and let go of this frame, if
+# any key at all went down and if the window was closed
+Controls = collections.namedtuple(
+    "Controls", ("held", "pressed", "released", "any_key", "quit")
+)
+
+NO_CONTROLS = Controls(frozenset(), frozenset(), frozenset(), False, False)
+
+
+def allow_events():
+    """Keep the events nothing reads, or that need no redraw, off the
+    queue"""
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(EVENT_TYPES + WINDOW_EVENTS)
+
+
+def parse_binding(value):
+    """Parse ACTION=KEY[,KEY...] of the command line into the action
+    and its key names, looked up once pygame is up"""
+    action, _, keys = value.partition("=")
+    if action not in DEFAULT_BINDINGS or not keys:
+        raise ValueError(
+            f"expected ACTION=KEY[,KEY...] with ACTION one of "
+            f"{', '.join(DEFAULT_BINDINGS)}"
+        )
+    return action, tuple(keys.split(","))
+
+
+def key_bindings(overrides=()):
+    """Return the default bindings with the (action, key names) pairs
+    of overrides in place of theirs"""
+    bindings = dict(DEFAULT_BINDINGS)
+    for action, names in overrides:
+        bindings[action] = tuple(pygame.key.key_code(name) for name in names)
+    return bindings
+
+
+def combine(first, second):
+    """Return the controls of two players on one cannon"""
+    return Controls(
+        first.held | second.held,
+        first.pressed | second.pressed,
+        first.released | second.released,
+        first.any_key or second.any_key,
+        first.quit or second.quit,
+    )
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class InputState:
+    """Works the events of each frame out into its controls"""
+
+    def __init__(self, bindings=None, keyboard=True):
+        """keyboard reads SDL's keyboard state too, off for input that
+        only ever comes as events"""
+        self._actions = {}
+        for action, keys in (bindings or DEFAULT_BINDINGS).items():
+            for key in keys:
+                self._actions.setdefault(key, []).append(action)
+        self._keyboard = keyboard
+        # keys down according to the events
+        self._down = set()
+        self._held = frozenset()
+
+    def update(self, events):
+        """Return the controls of the frame with events"""
+        pressed = set()
+        released = set()
+        any_key = False
+        close = False
+        for event in events:
+            if event.type == pygame.QUIT:
+                close = True
+            elif event.type == pygame.KEYDOWN:
+                any_key = True
+                self._down.add(event.key)
+                pressed.update(self._actions.get(event.key, ()))
+            elif event.type == pygame.KEYUP:
+                self._down.discard(event.key)
+                released.update(self._actions.get(event.key, ()))
+
+        keys = set(self._down)
+        if self._keyboard:
+            state = pygame.key.get_pressed()
+            keys.update(key for key in self._actions if state[key])
+        held = frozenset(
+            action for key in keys for action in self._actions.get(key, ())
+        )
+        # the state catches what the events miss, and the other way round.
+        # An action stays held while any of its keys is
+        pressed = (pressed - self._held) | (held - self._held)
+        released = (released - held) | (self._held - held)
+        self._held = held
+        return Controls(
+            held, frozenset(pressed), frozenset(released), any_key, close
+        )
@@ -3,42 +3,297 @@
 # @lulzsun
 """Game objects to create PyGame based games."""
 
+import argparse
+import math
 import os
+import queue
+import threading
+import time
 import warnings
 
+# imported ahead of pygame so the report includes the pygame import
+from videogame.startup import StartupProfile
+
+# pylint: disable=wrong-import-order,ungrouped-imports
 import pygame
 import pygame._sdl2 as sdl2
 
-from videogame.scene import (
-    ControlsScene, CreditScene, InvadersGameScene,
-    LeaderboardScene, Scene, TitleScene
+from videogame import (
+    capture, indexed, latency, netplay, pacing, profiler, telemetry, waves
+)
+from videogame.controls import (
+    EVENT_TYPES, InputState, allow_events, key_bindings, parse_binding
 )
+from videogame.particles import ParticleSystem
+from videogame.render import (
+    DisplayList, Presenter, Snapshot, SnapshotBuffer, TexturePresenter
+)
+from videogame.savestate import RewindBuffer
+from videogame.sound import Sound
+
+
+def parse_grid(value):
+    """Split COLUMNSxROWS, a single number meaning a square"""
+    columns, _, rows = value.lower().partition('x')
+    return (int(columns), int(rows or columns))
+
+
+def _add_stress_options(parser):
+    """Add the options of the stress test to parser"""
+    stress = parser.add_argument_group("stress test")
+    stress.add_argument(
+        "--stress", type=parse_grid, metavar="COLUMNSxROWS",
+        help="instead of playing, grow the formation from 11x5 up to "
+             "COLUMNSxROWS and print what each part of a frame costs"
+    )
+    stress.add_argument(
+        "--stress-steps", type=int, default=6, metavar="N",
+        help="formation sizes to measure, 6 by default"
+    )
+    stress.add_argument(
+        "--stress-frames", type=int, default=120, metavar="N",
+        help="frames to play at each size, 120 by default"
+    )
+    stress.add_argument(
+        "--stress-bullets", type=int, metavar="N",
+        help="bullets of each side with the largest formation, one for "
+             "every 11x5 aliens by default"
+    )
+    stress.add_argument(
+        "--stress-shields", type=int, metavar="N",
+        help="shields with the largest formation, 4 for every 11 "
+             "columns by default"
+    )
+
 
+def _add_profiling_options(parser):
+    """Add the options of profiling to parser"""
+    profiling = parser.add_argument_group("profiling")
+    profiling.add_argument(
+        "--profile", metavar="SCENE",
+        help="profile the first scene of class SCENE, such as "
+             "InvadersGameScene. F12 profiles the scene playing at any "
+             "time"
+    )
+    profiling.add_argument(
+        "--profile-frames", type=int, default=600, metavar="N",
+        help="frames a profile lasts unless the scene ends first, 600 "
+             "by default"
+    )
+    profiling.add_argument(
+        "--profile-dir", default="profiles", metavar="DIR",
+        help="where profiles are written as .pstats and collapsed "
+             "stacks, profiles/ by default"
+    )
+    profiling.add_argument(
+        "--telemetry", metavar="DIR",
+        help="record kills, deaths, waves, shots and frame times as "
+             "binary records in rotating files in DIR"
+    )
 
+
+def parse_args(argv=None):
+    """Parse the command line options of the game."""
+    parser = argparse.ArgumentParser(description="1978 Space Invaders")
+    parser.add_argument(
+        "--startup-profile", action="store_true",
+        help="print how long each startup phase took"
+    )
+    parser.add_argument(
+        "--lazy-init", action="store_true",
+        help="only start display and events before the first frame, "
+             "start sound and fonts in the background"
+    )
+    parser.add_argument(
+        "--threaded", action="store_true",
+        help="step the game on its own thread and only draw and present "
+             "on the main thread"
+    )
+    parser.add_argument(
+        "--backend", choices=["surface", "texture"], default="surface",
+        help="draw with surface blits, or with SDL textures on the GPU "
+             "(SDL's software renderer when there is none)"
+    )
+    parser.add_argument(
+        "--scale", type=int, metavar="N",
+        help="open the window N times the size of the game, with the "
+             "surface backend sprites are scaled once and drawn at full "
+             "resolution instead of scaling every frame"
+    )
+    parser.add_argument(
+        "--indexed", action="store_true",
+        help="draw with 8-bit palette indexed sheets onto an 8-bit "
+             "buffer, which is turned into the display format once per "
+             "frame"
+    )
+    parser.add_argument(
+        "--synth", action="store_true",
+        help="generate the sounds with a tone generator, like the "
+             "cabinet did, instead of playing the sound files"
+    )
+    parser.add_argument(
+        "--particles", action="store_true",
+        help="burst debris out of explosions"
+    )
+    parser.add_argument(
+        "--waves", choices=sorted(waves.WAVES), default="classic",
+        help="the waves to play, descending starts every wave lower and "
+             "lets the aliens fire more at once"
+    )
+    parser.add_argument(
+        "--rewind", action="store_true",
+        help="keep the last 10 seconds of play, hold backspace to rewind"
+    )
+    parser.add_argument(
+        "--capture", metavar="FILE",
+        help="record every frame to FILE as raw 224x256 RGB, or pipe the "
+             "frames to a command such as an encoder with '|COMMAND'"
+    )
+    parser.add_argument(
+        "--latency", action="store_true",
+        help="time every key press from when it came in to when the "
+             "frame that handled it was presented, print the percentiles "
+             "on exit"
+    )
+    parser.add_argument(
+        "--low-latency", action="store_true",
+        help="read input as late before each frame as the frame allows, "
+             "and present with vsync when the display has it"
+    )
+    parser.add_argument(
+        "--pacing", choices=["sleep", "busy", "hybrid"], default="sleep",
+        help="wait for frames by sleeping like pygame's clock, by "
+             "spinning, or by sleeping most of the wait and spinning "
+             "the rest"
+    )
+    parser.add_argument(
+        "--governor", action="store_true",
+        help="time the work of every frame, and drop debris, score "
+             "redraws and the colored gel while frames run over budget "
+             "to keep 60 Hz"
+    )
+    parser.add_argument(
+        "--bind", type=parse_binding, action="append", default=[],
+        metavar="ACTION=KEY[,KEY]",
+        help="play ACTION (left, right, fire, toggle, rewind, save, load "
+             "or profile) with the keys named, such as fire=z or "
+             "left=j,left. Can be given more than once"
+    )
+    link = parser.add_mutually_exclusive_group()
+    link.add_argument(
+        "--host", type=netplay.parse_address, metavar="[ADDRESS:]PORT",
+        help="stream the game to spectators, and a player sharing the "
+             "cannon, connecting to PORT. Only this machine can connect "
+             "unless ADDRESS is given, such as 0.0.0.0 for any"
+    )
+    link.add_argument(
+        "--watch", metavar="HOST:PORT",
+        help="watch a game hosted with --host"
+    )
+    link.add_argument(
+        "--join", metavar="HOST:PORT",
+        help="join a game hosted with --host, your keys move the host's "
+             "cannon along with the host's. There is no second cannon"
+    )
+    parser.add_argument(
+        "--arcade", type=parse_grid, metavar="COLUMNSxROWS",
+        help="run a wall of autopiloted games in one window, click one "
+             "to hear it"
+    )
+    _add_stress_options(parser)
+    _add_profiling_options(parser)
+    options = parser.parse_args(argv)
+    if options.scale is not None and options.scale < 1:
+        parser.error("--scale must be at least 1")
+    if options.arcade and (options.threaded or options.scale
+                           or options.backend != "surface"):
+        parser.error("--arcade draws straight onto the window, it cannot "
+                     "be used with --threaded, --scale or --backend")
+    if options.indexed and (options.threaded or options.arcade
+                            or options.scale
+                            or options.backend != "surface"):
+        parser.error("--indexed draws onto one 8-bit buffer, it cannot be "
+                     "used with --threaded, --arcade, --scale or --backend")
+    if options.low_latency and (options.threaded or options.arcade):
+        parser.error("--low-latency reads input right before each step, "
+                     "it cannot be used with --threaded or --arcade")
+    if options.low_latency and options.pacing != "sleep":
+        parser.error("--low-latency paces frames itself, it cannot be "
+                     "used with --pacing")
+    if options.latency and options.arcade:
+        parser.error("--latency cannot be used with --arcade")
+    if options.stress and (options.threaded or options.arcade):
+        parser.error("--stress cannot be used with --threaded or --arcade")
+    if options.stress and min(options.stress) < 1:
+        parser.error("--stress needs at least one column and row")
+    if options.profile_frames < 1:
+        parser.error("--profile-frames must be at least 1")
+    if min(options.stress_steps, options.stress_frames) < 1:
+        parser.error("--stress-steps and --stress-frames must be at "
+                     "least 1")
+    if options.arcade and min(options.arcade) < 1:
+        parser.error("--arcade needs at least one column and row")
+    return options
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
 class SpaceInvadersGame():
     """The bread and butter of the operation. The game."""
 
-    def __init__(self):
+    def __init__(self, options=None):
         """Init the game."""
-        pygame.init()
+        self._options = options or parse_args([])
+        self._startup = StartupProfile(self._options.startup_profile)
+        if self._options.lazy_init:
+            with self._startup.phase("display init"):
+                pygame.display.init()
+            threading.Thread(
+                target=self._init_subsystems, daemon=True
+            ).start()
+        else:
+            with self._startup.phase("pygame.init"):
+                pygame.init()
+
+        self._load_modules()
+
         window_width = 224
         window_height = 256
+        if self._options.arcade:
+            columns, rows = self._options.arcade
+            window_width *= columns
+            window_height *= rows
         self._window_size = (window_width, window_height)
-        self._clock = pygame.time.Clock()
-        self._screen = pygame.display.set_mode(
-            self._window_size, pygame.SCALED | pygame.RESIZABLE
-        )
+        self._latency = None
+        self._governor = None
+        self._profiler = None
+        self._telemetry = None
+        self._clock = self._make_clock()
+        with self._startup.phase("window setup"):
+            self._open_window()
+        self._input = self._set_up_input()
 
-        initial_scale_factor = 3  # <-- adjustable
-        window = sdl2.Window.from_display_module()
-        window.size = (
-            window_width * initial_scale_factor,
-            window_height * initial_scale_factor
-        )
-        window.position = sdl2.WINDOWPOS_CENTERED
-        window.show()
+        # what the scenes draw onto, scenes can only draw onto the screen
+        # directly when it is a surface owned by this thread and the size
+        # of the game
+        self._target = self._screen
+        if self._options.indexed:
+            self._target = indexed.surface(self._window_size)
+        elif (self._options.threaded or self._screen is None
+                or self._screen.get_size() != self._window_size):
+            self._target = DisplayList(self._window_size)
 
-        pygame.display.set_caption("1978 Space Invaders")
+        self._capture = None
+        if self._options.capture:
+            self._capture = capture.FrameCapture(
+                self._options.capture, self._window_size
+            )
+
+        self._host = None
+        self._link = None
+        if self._options.host is not None or self._options.watch \
+                or self._options.join:
+            self._connect()
 
         if not pygame.font:
             warnings.warn("Fonts disabled.", RuntimeWarning)
@@ -52,48 +307,411 @@ class SpaceInvadersGame():
         print(f"Our data directory is {self._data_dir}")
         self.build_scene_graph()
 
+    def _load_modules(self):
+        """Switch on the optional modules asked for"""
+        if self._options.synth:
+            Sound.use_synth()
+
+        if self._options.particles:
+            ParticleSystem.enabled = True
+
+        if self._options.rewind:
+            RewindBuffer.enabled = True
+
+        waves.played = waves.WAVES[self._options.waves]
+
+        if self._options.indexed:
+            indexed.enabled = True
+
+    def _make_clock(self):
+        """Return what waits for each frame, for the pacing and latency
+        options"""
+        clock = pygame.time.Clock()
+        if self._options.latency or self._options.low_latency:
+            self._latency = latency.LatencyMeter()
+            clock = latency.FrameDelay(
+                self._latency, self._options.low_latency
+            )
+        if self._options.pacing != "sleep":
+            clock = pacing.make_clock(self._options.pacing)
+        if self._options.governor:
+            self._governor = pacing.Governor(clock)
+            clock = self._governor
+        if self._options.telemetry:
+            self._telemetry = telemetry.Telemetry(
+                self._options.telemetry, clock
+            )
+            clock = self._telemetry
+        return clock
+
+    def _set_up_input(self):
+        """Keep what the game does not read off the event queue, and
+        return the input state of the keys bound"""
+        allow_events()
+        try:
+            return InputState(key_bindings(self._options.bind))
+        except ValueError as error:
+            raise SystemExit(f"--bind: {error}") from error
+
+    def _open_window(self):
+        """Open the window and pick what presents frames in it"""
+        initial_scale_factor = self._options.scale or 3  # <-- adjustable
+        if self._options.arcade:
+            # the wall is big enough as it is
+            initial_scale_factor = 1
+        scaled_size = (
+            self._window_size[0] * initial_scale_factor,
+            self._window_size[1] * initial_scale_factor
+        )
+        if self._options.backend == "texture":
+            # no display surface, all drawing goes through a renderer
+            self._screen = None
+            window = sdl2.Window(
+                "1978 Space Invaders", scaled_size,
+                resizable=True, hidden=True
+            )
+            self._presenter = TexturePresenter(
+                window, self._window_size, vsync=self._options.low_latency
+            )
+        elif self._options.scale:
+            # a native resolution window, nothing scales the frame
+            self._screen = pygame.display.set_mode(scaled_size)
+            window = sdl2.Window.from_display_module()
+            self._presenter = Presenter(
+                self._screen, initial_scale_factor
+            )
+            pygame.display.set_caption("1978 Space Invaders")
+        else:
+            self._screen = self._set_mode()
+            window = sdl2.Window.from_display_module()
+            window.size = scaled_size
+            self._presenter = Presenter(self._screen)
+            pygame.display.set_caption("1978 Space Invaders")
+        window.position = sdl2.WINDOWPOS_CENTERED
+        window.show()
+        # SDL keeps a pointer to this object for window events, so
+        # it has to live as long as the window
+        self._window = window
+
+    def _set_mode(self):
+        """Open the window scaled by SDL, with vsync if it is wanted and
+        the display has it"""
+        flags = pygame.SCALED | pygame.RESIZABLE
+        if self._options.low_latency:
+            try:
+                return pygame.display.set_mode(
+                    self._window_size, flags, vsync=1
+                )
+            except pygame.error:
+                pass
+        return pygame.display.set_mode(self._window_size, flags)
+
+    def _connect(self):
+        """Start hosting, or connect to a host"""
+        if self._options.host is not None:
+            address, port = self._options.host
+            self._host = netplay.Host(port, address)
+            return
+        address = netplay.parse_address(
+            self._options.watch or self._options.join
+        )
+        role = netplay.PLAYER if self._options.join else netplay.SPECTATOR
+        try:
+            self._link = netplay.Client(address, role)
+        except OSError as error:
+            raise SystemExit(
+                f"Cannot connect to {address[0]}:{address[1]}: {error}"
+            ) from error
+
+    def _init_subsystems(self):
+        """Start the mixer and font subsystems, off the main thread"""
+        start = time.perf_counter()
+        if pygame.mixer:
+            try:
+                pygame.mixer.init()
+            except pygame.error as pygame_error:
+                warnings.warn(f"Sound disabled: {pygame_error}")
+        if pygame.font:
+            pygame.font.init()
+        self._startup.add(
+            "mixer/font (background)", start, time.perf_counter()
+        )
+
     def build_scene_graph(self):
-        """Build scene graph for the game demo."""
+        """Build scene graph for the game demo.
+        Scenes are named rather than imported, see scene_class()."""
         self._scene_graph = [
-            CreditScene(self._screen),  # i have no idea but
-            ControlsScene,              # without this, we
-            TitleScene,                 # would get seg faults...
-            InvadersGameScene,
-            LeaderboardScene,
+            "CreditScene",
+            "ControlsScene",
+            "TitleScene",
+            "InvadersGameScene",
+            "LeaderboardScene",
+            "AttractScene",
         ]
 
+    @staticmethod
+    def scene_class(name):
+        """Import the scene module on first use and return a scene class,
+        it is only imported once the first frame is on screen"""
+        # I know what I'm doing, linter.
+        # pylint: disable-next=import-outside-toplevel
+        from videogame import scene
+        return getattr(scene, name)
+
+    def _present_first_frame(self):
+        """Put a blank frame on screen before anything else is loaded"""
+        self._target.fill("black")
+        self._show()
+        self._startup.mark("first frame")
+
     def run(self):
         """Run the game; the main game loop."""
+        self._present_first_frame()
+        if self._options.arcade:
+            self._run_arcade()
+            return 0
+        if self._options.stress:
+            # I know what I'm doing, linter.
+            # pylint: disable-next=import-outside-toplevel
+            from videogame import stress
+            stress.run(self._options)
+            self._shut_down()
+            return 0
         index = 0
-        current_scene = self._scene_graph[0]
+        with self._startup.phase("first scene"):
+            # i have no idea but without constructing the first
+            # scene up front, we would get seg faults...
+            current_scene = self.scene_class(
+                "RemoteScene" if self._link else self._scene_graph[0]
+            )(self._target)
+            if self._link:
+                current_scene.link = self._link
+        base_scene = self.scene_class("Scene")
         while True:
             current_scene.start_scene()
-            while current_scene.is_valid():
-                self._clock.tick(current_scene.frame_rate())
-                for event in pygame.event.get():
-                    current_scene.process_event(event)
-                current_scene.update_scene()
-                current_scene.draw()
-                current_scene.render_updates()
-                pygame.display.update()
+            if self._options.threaded:
+                self._play_scene_threaded(current_scene)
+            else:
+                self._play_scene(current_scene)
             while (not current_scene.end_scene()
                    and not current_scene.is_exiting):
                 self._clock.tick(current_scene.frame_rate())
-                for event in pygame.event.get():
-                    Scene(self._screen).process_event(event)
-                pygame.display.update()
-            if current_scene.is_exiting:
+                # only quitting is left to do while the scene fades
+                base_scene.handle_input(
+                    current_scene, self._controls(current_scene)
+                )
+                self._present()
+            if current_scene.is_exiting or self._link:
                 break
 
+            name = self._scene_graph[index]
             hi_score = 0
-            if isinstance(current_scene, InvadersGameScene):
+            if name == "InvadersGameScene":
                 hi_score = current_scene.p1_score
 
-            if isinstance(current_scene, LeaderboardScene):
-                index = 1
-            index += 1
-            current_scene = self._scene_graph[index](self._screen)
-            if isinstance(current_scene, LeaderboardScene):
+            index = self._next_index(index, current_scene)
+            name = self._scene_graph[index]
+            current_scene = self.scene_class(name)(self._target)
+            if name == "LeaderboardScene":
                 current_scene.hi_score = hi_score
-        pygame.quit()
+            if name == "InvadersGameScene":
+                current_scene.host = self._host
+                if self._telemetry is not None:
+                    current_scene.record_event = self._telemetry.record
+        self._shut_down()
         return 0
+
+    def _next_index(self, index, scene):
+        """Return the index of the scene to play after scene, which
+        is at index in the scene graph"""
+        name = self._scene_graph[index]
+        if name == "LeaderboardScene":
+            index = 1
+        if name == "TitleScene" and scene.is_idle:
+            index = self._scene_graph.index("AttractScene") - 1
+        if name == "AttractScene":
+            index = self._scene_graph.index("TitleScene") - 1
+        return index + 1
+
+    def _run_arcade(self):
+        """Run the wall of games of --arcade until the window closes"""
+        # I know what I'm doing, linter.
+        # pylint: disable-next=import-outside-toplevel
+        from videogame.arcade import Arcade
+        arcade = Arcade(self._screen, *self._options.arcade)
+        while True:
+            self._clock.tick(60)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    print(arcade.report())
+                    self._shut_down()
+                    return
+                arcade.process_event(event)
+            arcade.step()
+            self._present()
+
+    def _shut_down(self):
+        """Close whatever the options opened, and quit pygame"""
+        if self._host is not None:
+            self._host.close()
+        if self._link is not None:
+            self._link.close()
+        if self._capture is not None:
+            self._capture.close()
+        if self._options.latency:
+            print(self._latency.report())
+        if self._governor is not None:
+            print(self._governor.report())
+        if self._profiler is not None:
+            self._profiler.finish()
+        if self._telemetry is not None:
+            self._telemetry.close()
+        pygame.quit()
+
+    # I know what I'm doing, linter.
+    # pylint: disable-next=unused-argument
+    def _events(self, scene):
+        """Return the events of the next frame of scene, the soak test
+        hands out its own"""
+        if self._latency is not None:
+            return self._latency.events()
+        return pygame.event.get()
+
+    def _controls(self, scene):
+        """Return the controls of the next frame of scene, which may
+        start or end a profile"""
+        controls = self._input.update(self._events(scene))
+        start = "profile" in controls.pressed
+        if self._profiler is None and (start or self._options.profile):
+            self._profiler = profiler.FrameProfiler(
+                self._options.profile_frames, self._options.profile_dir,
+                self._options.profile
+            )
+        if self._profiler is not None:
+            self._profiler.frame(scene, start)
+        return controls
+
+    def _present(self, snapshot=None):
+        """Show a frame of a scene"""
+        self._show(snapshot)
+        if self._latency is not None:
+            # a threaded frame is shown while the next one is stepped
+            # with the input just handed out
+            self._latency.presented(
+                1 if snapshot is not None and snapshot.valid else 0
+            )
+        self._startup.finish()
+
+    def _show(self, snapshot=None):
+        """Show the frame, drawing the recorded commands first when
+        scenes draw onto a display list"""
+        if self._options.indexed:
+            # the one conversion of the frame to the display format
+            self._screen.blit(self._target, (0, 0))
+        elif snapshot is None and self._target is not self._screen:
+            snapshot = self._target.snapshot(0)
+        if snapshot is not None:
+            self._presenter.draw(snapshot)
+        if self._capture is not None:
+            self._capture.grab(self._presenter.frame())
+        if self._latency is not None:
+            self._latency.drawn()
+        self._presenter.present()
+
+    def _play_scene(self, scene):
+        """Play a scene frame by frame until it is no longer valid"""
+        while scene.is_valid():
+            self._rest(scene)
+            self._clock.tick(scene.frame_rate())
+            scene.handle_input(self._controls(scene))
+            scene.update_scene()
+            scene.draw()
+            scene.render_updates()
+            self._present()
+
+    def _rest(self, scene):
+        """Sleep for as long as scene would only draw the same frame
+        again, until there is input, the window has to be drawn again
+        or the scene has something new to show. The frame after a rest
+        is drawn in full. The latency meter reads the events itself,
+        and a capture is kept at the frame rate."""
+        frames = scene.idle_frames()
+        if (not frames or self._latency is not None
+                or self._capture is not None):
+            return
+        rate = scene.frame_rate()
+        start = time.perf_counter()
+        # a timeout of 0 waits for as long as it takes
+        event = pygame.event.wait(
+            0 if math.isinf(frames) else max(1, int(frames * 1000 / rate))
+        )
+        if event.type in EVENT_TYPES:
+            # read along with the rest of the events of the frame, a
+            # window event only has to wake the game up
+            pygame.event.post(event)
+        scene.skip_frames(
+            min(frames, round((time.perf_counter() - start) * rate))
+        )
+        # the wait is no frame's work, for the clocks that time it
+        self._clock.tick()
+
+    def _play_scene_threaded(self, scene):
+        """Play a scene stepped by a simulation thread.
+        While frame N is drawn and presented here, the simulation is
+        already working on frame N+1."""
+        simulation = SimulationThread(scene, self._target)
+        simulation.start()
+        simulation.step(self._controls(scene))
+        frame = 1
+        while True:
+            self._clock.tick(scene.frame_rate())
+            snapshot = simulation.snapshots.wait_for(frame)
+            if snapshot.valid:
+                simulation.step(self._controls(scene))
+                frame += 1
+            self._present(snapshot)
+            if not snapshot.valid:
+                break
+        simulation.join()
+        if simulation.error is not None:
+            raise simulation.error
+
+
+class SimulationThread(threading.Thread):
+    """Steps a scene on its own thread and publishes each frame as an
+    immutable snapshot of draw commands."""
+
+    def __init__(self, scene, display_list: DisplayList):
+        super().__init__(name="simulation", daemon=True)
+        self.snapshots = SnapshotBuffer()
+        self.error = None
+        self._scene = scene
+        self._display_list = display_list
+        self._controls = queue.Queue()
+
+    def step(self, controls):
+        """Hand the controls of the next frame to the simulation"""
+        self._controls.put(controls)
+
+    def run(self):
+        frame = 0
+        try:
+            while True:
+                self._scene.handle_input(self._controls.get())
+                self._scene.update_scene()
+                self._scene.draw()
+                self._scene.render_updates()
+                frame += 1
+                valid = self._scene.is_valid()
+                self.snapshots.publish(
+                    self._display_list.snapshot(frame, valid)
+                )
+                if not valid:
+                    return
+        # the error is raised again on the main thread
+        # pylint: disable-next=broad-exception-caught
+        except Exception as error:
+            self.error = error
+            self.snapshots.publish(
+                Snapshot(frame + 1, (), (), (), (), False)
+            )
@@ -0,0 +1,358 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Golden frames, a check that the game still draws what it used to.
+
+    python -m videogame.golden [-- game options]
+    python -m videogame.golden --update --frames 3600 --seed 0
+
+The game is played headless from a seed, with the inputs of a log, and
+every few frames a checksum of the pixels on screen is taken. The
+inputs and checksums of a run are kept in golden/ and every later run
+is played the same way and compared to them. The first frame that
+differs is written out, next to the frame it should have been and a
+picture of the pixels that changed, and the run fails. A change that
+is only meant to draw faster can be checked with it before it goes in.
+
+A checksum is the CRC-32 of the pixels of the screen, read in place
+through a surfarray view, which costs a fraction of a millisecond. An
+update also keeps every checked frame in golden/frames.z, each as the
+XOR of its pixels with those of the frame before, all compressed
+together. Most of the screen stays the same from one frame to the
+next, so the 360 frames of a minute of play take about 110 KB and are
+committed with the checksums, and any checkout can show the frame it
+should have been.
+"""
+
+import argparse
+import os
+import random
+import shlex
+import sys
+import tempfile
+import zlib
+
+import numpy
+import pygame
+
+from videogame import game
+from videogame.soak import Bot, Replay, Stopwatch
+
+GOLDEN = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "golden"
+)
+# the file of the golden directory the checked frames are kept in
+FRAMES = "frames.z"
+# frames between checksums of an update
+EVERY = 10
+# how much the frame it should have been is darkened under the changes,
+# and the color the changed pixels are marked with
+DIM = 4
+CHANGED = (255, 0, 255)
+
+
+def parse_args(argv=None):
+    """Parse the command line options of the golden frames check."""
+    parser = argparse.ArgumentParser(
+        prog="python -m videogame.golden",
+        description="Play the game headless and compare what it draws to "
+                    "the golden frames"
+    )
+    parser.add_argument(
+        "--update", action="store_true",
+        help="record new golden frames instead of comparing to them"
+    )
+    parser.add_argument(
+        "--frames", type=int, default=3600,
+        help="how many frames an update plays"
+    )
+    parser.add_argument(
+        "--every", type=int, default=EVERY, metavar="N",
+        help="frames between checksums of an update"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed of the game and the bot of an update"
+    )
+    parser.add_argument(
+        "--golden", metavar="DIR", default=GOLDEN,
+        help="where the inputs, checksums and frames are kept"
+    )
+    parser.add_argument(
+        "--out", metavar="DIR", default="golden-diff",
+        help="where the first frame that differs is written"
+    )
+    parser.add_argument(
+        "game_args", nargs=argparse.REMAINDER,
+        help="options for the game, after --, added to those of the update"
+    )
+    options = parser.parse_args(argv)
+    if options.game_args[:1] == ["--"]:
+        options.game_args = options.game_args[1:]
+    if options.every < 1:
+        parser.error("--every has to be at least 1")
+    # the game is played in a directory of its own
+    options.golden = os.path.abspath(options.golden)
+    options.out = os.path.abspath(options.out)
+    return options
+
+
+def main(argv=None):
+    """Record the golden frames, or compare a run to them"""
+    options = parse_args(argv)
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    if options.update:
+        return _update(options)
+    return _compare(options)
+
+
+def _update(options):
+    """Play with the bot and keep its inputs, checksums and frames"""
+    os.makedirs(options.golden, exist_ok=True)
+    played = play(options)
+    with open(os.path.join(options.golden, "checksums.txt"), "w",
+              encoding="utf-8") as checksums:
+        checksums.write(f"every {options.every}\n")
+        checksums.write(f"options {shlex.join(options.game_args)}\n")
+        for frame, value in sorted(played.checksums.items()):
+            checksums.write(f"{frame} {value:08x}\n")
+    print(f"Recorded {len(played.checksums)} checksums of {options.frames} "
+          f"frames, seed {options.seed}, to {options.golden}")
+    return 0
+
+
+def _compare(options):
+    """Replay the inputs of the update and compare every checksum"""
+    with open(os.path.join(options.golden, "inputs.log"),
+              encoding="utf-8") as log:
+        options.seed = int(log.readline().split()[1])
+    expected = {}
+    with open(os.path.join(options.golden, "checksums.txt"),
+              encoding="utf-8") as checksums:
+        options.every = int(checksums.readline().split()[1])
+        options.game_args = shlex.split(
+            checksums.readline().partition(" ")[2]
+        ) + options.game_args
+        for line in checksums:
+            frame, value = line.split()
+            expected[int(frame)] = int(value, 16)
+
+    played = play(options, expected)
+    if played.mismatch is not None:
+        print(f"FAIL: frame {played.mismatch} differs from the golden "
+              f"frame, written to {options.out}")
+        return 1
+    missing = sorted(set(expected) - set(played.checksums))
+    if missing:
+        print(f"FAIL: the run ended before frame {missing[0]}")
+        return 1
+    print(f"PASS: {len(played.checksums)} frames match, one in every "
+          f"{options.every}")
+    return 0
+
+
+def play(options, expected=None):
+    """Play the game in a directory of its own, where the leaderboard
+    starts out empty and is thrown away after, and return it"""
+    here = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            played = GoldenGame(options, expected)
+            played.run()
+        finally:
+            os.chdir(here)
+    return played
+
+
+def checksum(surf):
+    """Return the CRC-32 of the pixels of surf, read where they are"""
+    pixels = pygame.surfarray.pixels2d(surf)
+    # rows follow each other in memory, unless SDL pads them
+    rows = pixels.T
+    if rows.flags.c_contiguous:
+        value = zlib.crc32(rows)
+    else:
+        value = 0
+        for row in rows:
+            value = zlib.crc32(row, value)
+    # unlocks surf
+    del pixels, rows
+    return value
+
+
+class FrameWriter:
+    """Keeps the checked frames of an update in one compressed file"""
+
+    def __init__(self, path):
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, "wb")
+        self._compressor = zlib.compressobj(9)
+        self._last = None
+
+    def write(self, frame):
+        """Add frame, as what changed since the frame before"""
+        pixels = numpy.frombuffer(
+            pygame.image.tobytes(frame, "RGB"), numpy.uint8
+        )
+        if self._last is None:
+            self._file.write(
+                f"{frame.get_width()} {frame.get_height()}\n".encode()
+            )
+            change = pixels
+        else:
+            change = pixels ^ self._last
+        self._last = pixels
+        self._file.write(self._compressor.compress(change.tobytes()))
+
+    def close(self):
+        """Write out what is left and close the file"""
+        self._file.write(self._compressor.flush())
+        self._file.close()
+
+
+def read_frame(path, index):
+    """Return the frame an update kept at index, or None when it did not
+    keep that many"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as frames:
+        width, height = map(int, frames.readline().split())
+        data = frames.read()
+    size = width * height * 3
+    pixels = numpy.zeros(size, numpy.uint8)
+    decompressor = zlib.decompressobj()
+    for _ in range(index + 1):
+        change = decompressor.decompress(data, size)
+        data = decompressor.unconsumed_tail
+        if len(change) < size:
+            return None
+        pixels ^= numpy.frombuffer(change, numpy.uint8)
+    return pygame.image.frombytes(pixels.tobytes(), (width, height), "RGB")
+
+
+def write_difference(frame, golden_frame, out, name):
+    """Write frame, the golden frame it should have been when there is
+    one, and the pixels that changed between them, to out"""
+    os.makedirs(out, exist_ok=True)
+    pygame.image.save(frame, os.path.join(out, f"{name}-actual.png"))
+    if golden_frame is None:
+        print("No golden frame to compare with, update on a build that "
+              "draws it right to have one")
+        return
+    pygame.image.save(golden_frame, os.path.join(out, f"{name}-golden.png"))
+    got = pygame.surfarray.array3d(frame)
+    wanted = pygame.surfarray.array3d(golden_frame)
+    if got.shape != wanted.shape:
+        print(f"The frame is {got.shape[:2]}, the golden frame "
+              f"{wanted.shape[:2]}")
+        return
+    changed = (got != wanted).any(axis=2)
+    difference = wanted // DIM
+    difference[changed] = CHANGED
+    pygame.image.save(
+        pygame.surfarray.make_surface(difference),
+        os.path.join(out, f"{name}-diff.png")
+    )
+    columns, rows = numpy.nonzero(changed)
+    print(f"{len(columns)} pixels changed, between ({columns.min()}, "
+          f"{rows.min()}) and ({columns.max()}, {rows.max()})")
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class GoldenGame(game.SpaceInvadersGame):
+    """The game played by the bot or from its inputs, taking a checksum
+    of the screen every few frames"""
+
+    def __init__(self, options, expected=None):
+        """expected are the checksums of each frame to compare with,
+        None to record new ones"""
+        random.seed(options.seed)
+        super().__init__(game.parse_args(options.game_args))
+        self._clock = Stopwatch(self._clock)
+        self._golden = options
+        self._expected = expected
+        # frames whose inputs were handed out, and frames shown
+        self._frame = 0
+        self._shown = 0
+        self.checksums = {}
+        # the first frame that differed
+        self.mismatch = None
+        self._log = None
+        self._frames = None
+        self._quitting = False
+        if expected is None:
+            self._inputs = Bot(options.seed)
+            self._frames = FrameWriter(os.path.join(options.golden, FRAMES))
+            # pylint: disable-next=consider-using-with
+            self._log = open(
+                os.path.join(options.golden, "inputs.log"), "w",
+                encoding="utf-8"
+            )
+            self._log.write(f"seed {options.seed}\n")
+        else:
+            self._inputs = Replay(os.path.join(options.golden, "inputs.log"))
+
+    def _events(self, scene):
+        """Return the events of the next frame, and quit once the run
+        is over or a frame differed"""
+        self._frame += 1
+        events = pygame.event.get()
+        if self._log is not None:
+            inputs = self._inputs.events(scene)
+            for event in inputs:
+                self._log.write(f"{self._frame} {event.type} {event.key}\n")
+            over = self._frame >= self._golden.frames
+        else:
+            inputs = self._inputs.events(self._frame)
+            over = self._frame >= self._inputs.last_frame
+        events.extend(inputs)
+        if over or self.mismatch is not None:
+            if self._log is not None and not self._quitting:
+                self._log.write(f"end {self._frame}\n")
+            self._quitting = True
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+    # I know what I'm doing, linter.
+    # pylint: disable-next=unused-argument
+    def _rest(self, scene):
+        """Never rest, resting lasts as long as it takes in real time"""
+
+    def _present(self, snapshot=None):
+        """Show a frame, and check it when it is one of those checked"""
+        super()._present(snapshot)
+        if self._shown % self._golden.every == 0:
+            self._check(self._presenter.frame())
+        self._shown += 1
+
+    def _check(self, frame):
+        """Take the checksum of a frame, and keep the frame on an update
+        or compare it on a check"""
+        value = checksum(frame)
+        self.checksums[self._shown] = value
+        if self._expected is None:
+            self._frames.write(frame)
+        elif (self.mismatch is None
+                and self._expected.get(self._shown) != value):
+            self.mismatch = self._shown
+            golden_frame = read_frame(
+                os.path.join(self._golden.golden, FRAMES),
+                self._shown // self._golden.every
+            )
+            write_difference(
+                frame, golden_frame, self._golden.out, f"{self._shown:06}"
+            )
+
+    def _shut_down(self):
+        if self._log is not None:
+            self._log.close()
+        if self._frames is not None:
+            self._frames.close()
+        super()._shut_down()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
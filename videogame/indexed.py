@@ -0,0 +1,96 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""8-bit drawing, for boards with little memory bandwidth to spare.
+
+The artwork is black and white, the only color on screen comes from the
+gels laid over bands of it. With indexed color on, every sheet is
+loaded as an 8-bit surface sharing one palette, scenes draw onto an
+8-bit buffer with the same palette, and blits copy one byte per pixel
+instead of four. A gel is laid over a band by looking every palette
+index of the band up in a table of what that color becomes under the
+gel, which is in the palette as well. The buffer is turned into the
+format of the display once per frame, when it is presented.
+"""
+
+import numpy
+import pygame
+
+# off unless asked for, sheets are loaded 8-bit while it is on. It has
+# to be on before the first sheet is loaded, sheets are loaded once
+# I know what I'm doing, linter.
+# pylint: disable-next=invalid-name
+enabled = False
+
+# the colors of the artwork, and the colors of the gels
+ARTWORK = ((0, 0, 0), (255, 255, 255))
+GELS = ((254, 30, 30), (30, 254, 30))
+
+
+def multiply(color, gel):
+    """Return color under gel, the way SDL multiplies them"""
+    return tuple(
+        (channel * filtered + 255) >> 8
+        for channel, filtered in zip(color, gel)
+    )
+
+
+def _palette():
+    """Return the artwork colors and what the gels turn them into"""
+    colors = list(ARTWORK)
+    for gel in GELS:
+        for color in ARTWORK:
+            if multiply(color, gel) not in colors:
+                colors.append(multiply(color, gel))
+    return colors + [(0, 0, 0)] * (256 - len(colors))
+
+
+def _nearest(color):
+    """Return the index of the palette color closest to color"""
+    return min(
+        range(len(PALETTE)),
+        key=lambda index: sum(
+            (channel - other) ** 2
+            for channel, other in zip(PALETTE[index], color)
+        )
+    )
+
+
+PALETTE = _palette()
+# index under each gel, for every index
+_TABLES = {
+    gel: numpy.array(
+        [_nearest(multiply(color, gel)) for color in PALETTE], numpy.uint8
+    )
+    for gel in GELS
+}
+
+
+def surface(size):
+    """Return an 8-bit surface of size with the palette"""
+    indexed = pygame.Surface(size, depth=8)
+    indexed.set_palette(PALETTE)
+    return indexed
+
+
+def convert(sheet):
+    """Return sheet as an 8-bit surface with the palette"""
+    indexed = surface(sheet.get_size())
+    indexed.blit(sheet, (0, 0))
+    return indexed
+
+
+def is_indexed(surf):
+    """Return True if surf is an 8-bit surface"""
+    return isinstance(surf, pygame.Surface) and surf.get_bitsize() == 8
+
+
+def lay_gel(surf, gel, rect):
+    """Tint rect of an 8-bit surface with the palette as if gel was
+    multiplied onto it"""
+    area = pygame.Rect(rect).clip(surf.get_rect())
+    pixels = pygame.surfarray.pixels2d(surf)
+    band = pixels[area.left:area.right, area.top:area.bottom]
+    band[...] = _TABLES[gel][band]
+    # unlocks surf
+    del pixels, band
@@ -0,0 +1,156 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""How long input takes to show on screen, and a frame loop that keeps
+that short.
+
+The meter takes events off SDL's queue itself and notes when each one
+came in, then when the frame that handled it was presented. pygame does
+not hand out SDL's own timestamps, so while waiting for a frame the
+queue is read every millisecond, which is as close as the stamps get.
+Input that comes in while a frame is worked on is stamped once it is
+done, so those come out a little short.
+
+FrameDelay stands in for the clock of the game. Without a delay it
+waits for frames the way pygame's clock does. With one it learns how
+long a frame takes from reading input to having it drawn, and starts
+each frame only a little more than that before it is due, so the input
+a frame reads is as fresh as it can be. That only pays off when
+presenting waits for the vertical blank of the display, so the window
+asks for vsync then.
+"""
+
+import collections
+import statistics
+import time
+
+import pygame
+
+# the events that count as input
+INPUT_EVENTS = frozenset((
+    pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP
+))
+# seconds between reads of the queue while waiting for a frame
+POLL_INTERVAL = 0.001
+# seconds a frame is started ahead of what the slowest recent one took
+# to draw, which leaves presenting it that long
+MARGIN = 0.002
+# how far past being due presenting can return before it is taken to
+# have waited for the vertical blank
+VSYNC_SLACK = 0.001
+
+
+class LatencyMeter:
+    """Times every input from when it came in to when the frame that
+    handled it was presented"""
+
+    def __init__(self):
+        # seconds from coming in to being presented, and the part of it
+        # spent waiting for a frame to read it
+        self.latencies = []
+        self.waits = []
+        self.drawn_at = 0.0
+        self.presented_at = 0.0
+        # events read off the queue but not handed out yet, and when
+        # each came in
+        self._gathered = []
+        # per frame handed out and not presented yet, when its input
+        # came in and was handed out
+        self._handled = collections.deque()
+
+    def gather(self):
+        """Read whatever is on SDL's queue, noting when"""
+        now = time.perf_counter()
+        self._gathered.extend((now, event) for event in pygame.event.get())
+
+    def events(self):
+        """Return every event that came in since the last frame, to be
+        handled by the next one"""
+        self.gather()
+        now = time.perf_counter()
+        self._handled.append([
+            (arrived, now) for arrived, event in self._gathered
+            if event.type in INPUT_EVENTS
+        ])
+        events = [event for _, event in self._gathered]
+        self._gathered.clear()
+        return events
+
+    def drawn(self):
+        """Note that a frame is drawn and about to be presented"""
+        self.drawn_at = time.perf_counter()
+
+    def presented(self, in_flight=0):
+        """Note that a frame was presented. The last in_flight frames
+        handed out are still being worked on, they show in later ones."""
+        self.presented_at = time.perf_counter()
+        while len(self._handled) > in_flight:
+            for arrived, handed in self._handled.popleft():
+                self.latencies.append(self.presented_at - arrived)
+                self.waits.append(handed - arrived)
+
+    def report(self):
+        """Return the latency percentiles as text"""
+        if not self.latencies:
+            return "Input latency: no input was presented"
+        lines = [f"Input latency of {len(self.latencies)} inputs, ms"]
+        for name, times in (
+            ("in to presented", self.latencies),
+            ("waiting for a frame", self.waits),
+        ):
+            times = sorted(times)
+            quantiles = statistics.quantiles(times, n=100) \
+                if len(times) > 1 else times * 99
+            lines.append(
+                f"  {name:<20} p50 {quantiles[49] * 1000:6.2f}"
+                f"  p95 {quantiles[94] * 1000:6.2f}"
+                f"  p99 {quantiles[98] * 1000:6.2f}"
+                f"  max {times[-1] * 1000:6.2f}"
+            )
+        return '\n'.join(lines)
+
+
+class FrameDelay:
+    """Waits for each frame while gathering input for the meter, with
+    delay as late before the frame is due as the frame allows"""
+
+    def __init__(self, meter: LatencyMeter, delay=False):
+        self.delay = delay
+        self._meter = meter
+        # seconds from starting a frame to having it drawn, lately. Not
+        # to presenting it, which may wait for the vertical blank
+        self._costs = collections.deque(maxlen=60)
+        self._deadline = time.perf_counter()
+        self._started = self._deadline
+
+    def lead(self):
+        """Return how long before it is due the next frame starts"""
+        if not self.delay or not self._costs:
+            return 0.0
+        return max(self._costs) + MARGIN
+
+    def tick(self, framerate=0):
+        """Wait for the next frame, return the milliseconds since the
+        last one started"""
+        presented = self._meter.presented_at
+        if presented > self._started:
+            self._costs.append(self._meter.drawn_at - self._started)
+            # presenting waited for the vertical blank, frames are due
+            # in step with it from now on
+            if self.delay and presented > self._deadline + VSYNC_SLACK:
+                self._deadline = presented
+
+        period = 1 / framerate if framerate else 0.0
+        self._deadline = max(self._deadline + period, time.perf_counter())
+        start = self._deadline - self.lead()
+        while True:
+            self._meter.gather()
+            left = start - time.perf_counter()
+            if left <= 0:
+                break
+            time.sleep(min(left, POLL_INTERVAL))
+
+        now = time.perf_counter()
+        took = now - self._started
+        self._started = now
+        return int(took * 1000)
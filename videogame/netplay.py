@@ -0,0 +1,299 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Streaming of a game to spectators, and to a player sharing the
+cannon, over TCP.
+
+The host sends the save state of every other frame, as a compressed
+delta against the last state that client got. A client loads each
+state it receives and keeps simulating on its own between them, so
+frames that are not sent, or held back by the bandwidth limit or the
+network, are predicted instead of frozen. A client that joined to play
+sends its keys the other way, and the host steers its one cannon with
+them as if they were pressed there. There is no second cannon and no
+second score, it is one game played from two keyboards.
+
+The host only listens on this machine unless told an address, the
+states it sends are not meant for the open internet.
+"""
+
+import socket
+import struct
+import time
+import zlib
+
+import pygame
+
+from videogame.savestate import apply_delta, delta
+
+NET_MAGIC = b'SINP'
+# bytes per second each client may be sent, and the most it may be sent
+# at once after a quiet spell
+BANDWIDTH = 32 * 1024
+BURST = 8 * 1024
+# frames between the states the host sends
+SEND_INTERVAL = 2
+# the only actions a joined player takes, and the keys they are sent as
+PLAYER_ACTIONS = ("left", "right", "fire")
+PLAYER_KEYS = frozenset((
+    pygame.K_a, pygame.K_d, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE
+))
+
+SPECTATOR = 0
+PLAYER = 1
+
+# message types, from the host
+STATE_FULL = 0
+STATE_DELTA = 1
+# and from a client
+KEY_DOWN = 2
+KEY_UP = 3
+
+_HELLO = struct.Struct('<4sB')
+# length of the message that follows
+_LENGTH = struct.Struct('<I')
+# type, frame
+_STATE = struct.Struct('<BI')
+# type, key
+_KEY = struct.Struct('<Bi')
+
+
+def parse_address(value):
+    """Split [HOST:]PORT, HOST defaulting to this machine"""
+    host, _, port = value.rpartition(':')
+    return (host or 'localhost', int(port))
+
+
+class Host:
+    """Listens for clients and streams frames to them"""
+
+    def __init__(self, port, address='localhost', bandwidth=BANDWIDTH,
+                 interval=SEND_INTERVAL):
+        self.bandwidth = bandwidth
+        self.interval = interval
+        self.clients = []
+        self.dropped = 0
+        self._frame = 0
+        self._socket = socket.create_server((address, port))
+        self._socket.setblocking(False)
+        # where clients connect to, port 0 picks a free one
+        self.address = self._socket.getsockname()[:2]
+
+    def poll(self):
+        """Take in new clients and return the key events sent by the
+        joined player since the last poll"""
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except BlockingIOError:
+                break
+            connection.setblocking(False)
+            connection.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+            )
+            self.clients.append(_Client(connection, self.bandwidth))
+
+        events = []
+        for client in list(self.clients):
+            if not client.receive():
+                self.clients.remove(client)
+                continue
+            for message in client.messages():
+                kind, key = _KEY.unpack(message)
+                # only one player shares the cannon, whoever joined first
+                if client.role == PLAYER and client is self._player():
+                    events.append(pygame.event.Event(
+                        pygame.KEYDOWN if kind == KEY_DOWN else pygame.KEYUP,
+                        key=key
+                    ))
+        return events
+
+    def due(self):
+        """Count a frame, return True if its state is to be sent. The
+        state is only saved for the frames that are sent."""
+        self._frame += 1
+        return bool(self.clients) and self._frame % self.interval == 0
+
+    def send(self, state):
+        """Send the state of this frame to every client that can take
+        it. A client that cannot take it skips the frame and gets the
+        changes with the next one it is sent."""
+        now = time.perf_counter()
+        for client in list(self.clients):
+            if client.role is None:
+                # has not said hello yet
+                continue
+            client.refill(now)
+            if client.outgoing is None:
+                self.clients.remove(client)
+                continue
+            if not client.flush():
+                self.dropped += 1
+                continue
+            if client.base is None:
+                message = _STATE.pack(STATE_FULL, self._frame) \
+                    + zlib.compress(state, 1)
+            else:
+                message = _STATE.pack(STATE_DELTA, self._frame) \
+                    + delta(client.base, state)
+            if len(message) > client.tokens:
+                self.dropped += 1
+                continue
+            client.tokens -= len(message)
+            client.base = state
+            client.outgoing += _LENGTH.pack(len(message)) + message
+            client.flush()
+
+    def close(self):
+        """Hang up on every client and stop listening"""
+        for client in self.clients:
+            client.connection.close()
+        self.clients.clear()
+        self._socket.close()
+
+    def _player(self):
+        """Return the client that shares the cannon, if any"""
+        for client in self.clients:
+            if client.role == PLAYER:
+                return client
+        return None
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class _Client:
+    """A connection from the point of view of the host"""
+
+    def __init__(self, connection, bandwidth):
+        self.connection = connection
+        self.role = None
+        # the last state this client was sent
+        self.base = None
+        self.bandwidth = bandwidth
+        self.tokens = BURST
+        self.outgoing = bytearray()
+        self._incoming = bytearray()
+        self._refilled = time.perf_counter()
+
+    def refill(self, now):
+        """Add the bytes this client may be sent since the last refill"""
+        self.tokens = min(
+            BURST, self.tokens + (now - self._refilled) * self.bandwidth
+        )
+        self._refilled = now
+
+    def receive(self):
+        """Read whatever arrived, return False once the client is gone"""
+        try:
+            data = self.connection.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        if not data:
+            return False
+        self._incoming += data
+        if self.role is None and len(self._incoming) >= _HELLO.size:
+            magic, role = _HELLO.unpack_from(self._incoming)
+            del self._incoming[:_HELLO.size]
+            if magic != NET_MAGIC:
+                return False
+            self.role = role
+        return True
+
+    def messages(self):
+        """Yield every whole key message read so far"""
+        if self.role is None:
+            return
+        while len(self._incoming) >= _KEY.size:
+            yield bytes(self._incoming[:_KEY.size])
+            del self._incoming[:_KEY.size]
+
+    def flush(self):
+        """Send what is still waiting, return True once nothing is.
+        Never blocks, a slow client just keeps its bytes waiting."""
+        if self.outgoing is None:
+            return False
+        try:
+            sent = self.connection.send(self.outgoing)
+            del self.outgoing[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.outgoing = None
+            return False
+        return not self.outgoing
+
+
+class Client:
+    """Connection to a host, as a spectator or as a player sharing the
+    cannon"""
+
+    def __init__(self, address, role=SPECTATOR):
+        self.role = role
+        self.closed = False
+        self.frame = 0
+        self._state = None
+        self._incoming = bytearray()
+        self._outgoing = bytearray()
+        self._socket = socket.create_connection(address, timeout=5)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket.sendall(_HELLO.pack(NET_MAGIC, role))
+        self._socket.setblocking(False)
+
+    def poll(self):
+        """Return the newest state sent by the host, or None if nothing
+        new arrived"""
+        self._flush()
+        while not self.closed:
+            try:
+                data = self._socket.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self.closed = True
+            self._incoming += data
+
+        newest = None
+        while len(self._incoming) >= _LENGTH.size:
+            length, = _LENGTH.unpack_from(self._incoming)
+            end = _LENGTH.size + length
+            if len(self._incoming) < end:
+                break
+            message = bytes(self._incoming[_LENGTH.size:end])
+            del self._incoming[:end]
+            kind, self.frame = _STATE.unpack_from(message)
+            body = message[_STATE.size:]
+            if kind == STATE_FULL:
+                self._state = zlib.decompress(body)
+            else:
+                self._state = apply_delta(self._state, body)
+            newest = self._state
+        return newest
+
+    def send_key(self, event):
+        """Send a key the joined player pressed or let go of"""
+        if self.role != PLAYER or event.key not in PLAYER_KEYS:
+            return
+        kind = KEY_DOWN if event.type == pygame.KEYDOWN else KEY_UP
+        self._outgoing += _KEY.pack(kind, event.key)
+        self._flush()
+
+    def close(self):
+        """Hang up"""
+        self._socket.close()
+        self.closed = True
+
+    def _flush(self):
+        """Send the keys that are still waiting, without blocking"""
+        if not self._outgoing or self.closed:
+            return
+        try:
+            sent = self._socket.send(self._outgoing)
+            del self._outgoing[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.closed = True
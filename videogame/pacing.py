@@ -0,0 +1,207 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Frame pacing, and a governor that trades looks for a steady 60 Hz.
+
+pygame's clock sleeps for the rest of a frame in whole milliseconds and
+the OS wakes it up whenever it gets around to it, so frames come a
+millisecond or two early or late. The busy clock spins the whole wait
+instead, which is exact and keeps a core busy. The hybrid clock sleeps
+for most of the wait and spins the last bit, and keeps to a schedule of
+when frames are due rather than counting from when the last one ended.
+
+The governor wraps whichever clock is picked and times the work of each
+frame, everything from one tick to the next. When frames keep running
+over their budget it steps the quality down a level, each level giving
+up one more thing the game can do without: half the debris from
+explosions, the rest of it, the scores being redrawn every frame, then
+every fourth frame, and finally the colored gel. The debris levels are
+skipped when there is no debris to give up. Once frames have had plenty
+of room for a while it steps back up. An old cabinet keeps the
+game running at full speed and loses a little polish instead of
+slowing everything down.
+"""
+
+import collections
+import statistics
+import time
+
+import pygame
+
+from videogame.particles import ParticleSystem
+
+# seconds the hybrid clock spins before a frame is due, the sleep
+# before that may overshoot by about as much
+SPIN = 0.002
+
+# quality levels from best to cheapest, each giving up one more thing:
+# the share of debris emitted, frames between redraws of the scores and
+# lives, and the colored gel. Between redraws the scores are one blit
+# of a colorkeyed layer, measured at about 60 us a frame on a desktop
+# against about 110 us for drawing their text every frame
+QUALITY_LEVELS = (
+    (1.0, 1, True),
+    (0.5, 1, True),
+    (0.0, 1, True),
+    (0.0, 4, True),
+    (0.0, 8, True),
+    (0.0, 8, False),
+)
+# share of a frame its work may take before it counts as over budget,
+# the rest is left for waiting and presenting
+BUDGET = 0.9
+# frames over budget among the last WINDOW that step the quality down
+MISSES = 5
+WINDOW = 30
+# share of a frame its work has to stay under, for CALM frames in a
+# row, to step the quality back up
+HEADROOM = 0.5
+CALM = 180
+# frames after a step before the next one, for the step to show
+SETTLE = 60
+
+
+def set_quality(level):
+    """Turn the optional costs of the game up or down to level"""
+    # the game holds the scenes back until its first frame is shown,
+    # by the time the quality steps one is playing
+    # I know what I'm doing, linter.
+    # pylint: disable-next=import-outside-toplevel
+    from videogame.scene import Scene
+    debris, hud_interval, color_gel = QUALITY_LEVELS[level]
+    ParticleSystem.density = debris
+    Scene.hud_interval = hud_interval
+    Scene.color_gel = color_gel
+
+
+def levels(debris):
+    """Return the quality levels that each give up something more than
+    the one before, those that only thin the debris only with debris"""
+    kept = [0]
+    for level in range(1, len(QUALITY_LEVELS)):
+        before, after = QUALITY_LEVELS[level - 1], QUALITY_LEVELS[level]
+        if after[1:] != before[1:] or (debris and after[0] != before[0]):
+            kept.append(level)
+    return tuple(kept)
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class BusyClock:
+    """pygame's clock, spinning instead of sleeping"""
+
+    def __init__(self):
+        self._clock = pygame.time.Clock()
+
+    def tick(self, framerate=0):
+        """Wait for the next frame, return the milliseconds since the
+        last one"""
+        return self._clock.tick_busy_loop(framerate)
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class HybridClock:
+    """Sleeps for most of the wait for a frame and spins the rest"""
+
+    def __init__(self):
+        self._deadline = time.perf_counter()
+        self._started = self._deadline
+
+    def tick(self, framerate=0):
+        """Wait for the next frame, return the milliseconds since the
+        last one started"""
+        period = 1 / framerate if framerate else 0.0
+        # a frame that ran long is not made up for by rushing the next
+        self._deadline = max(self._deadline + period, time.perf_counter())
+        while True:
+            left = self._deadline - time.perf_counter()
+            if left <= 0:
+                break
+            if left > SPIN:
+                time.sleep(left - SPIN)
+
+        now = time.perf_counter()
+        took = now - self._started
+        self._started = now
+        return int(took * 1000)
+
+
+def make_clock(pacing):
+    """Return the clock of a --pacing choice"""
+    if pacing == "busy":
+        return BusyClock()
+    if pacing == "hybrid":
+        return HybridClock()
+    return pygame.time.Clock()
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class Governor:
+    """Stands in for the clock, timing the work of every frame and
+    stepping the quality down and up"""
+
+    def __init__(self, clock):
+        self.quality = 0
+        # the levels stepped through, in order
+        self.levels = levels(ParticleSystem.enabled)
+        self.frames = 0
+        self.late = 0
+        self._clock = clock
+        # seconds of work of the last minute of frames, and whether the
+        # most recent were over budget
+        self._work = collections.deque(maxlen=60 * 60)
+        self._recent = collections.deque(maxlen=WINDOW)
+        self._calm = 0
+        self._settle = 0
+        self._started = None
+
+    def tick(self, framerate=0):
+        """Judge the frame that just ended, then wait for the next one
+        like the clock does"""
+        if self._started is not None and framerate:
+            self._judge(time.perf_counter() - self._started, 1 / framerate)
+        took = self._clock.tick(framerate)
+        self._started = time.perf_counter()
+        return took
+
+    def _judge(self, work, period):
+        """Count the work of a frame against its period, and step the
+        quality if it is time to"""
+        over = work > period * BUDGET
+        self.frames += 1
+        self.late += over
+        self._work.append(work)
+        self._recent.append(over)
+        self._calm = self._calm + 1 if work < period * HEADROOM else 0
+        if self._settle:
+            self._settle -= 1
+            return
+        if sum(self._recent) >= MISSES and self.quality < self.levels[-1]:
+            self._step(1, "frames are running late")
+        elif self._calm >= CALM and self.quality > 0:
+            self._step(-1, "frames have room again")
+
+    def _step(self, step, reason):
+        """Move the quality step levels down, up when negative"""
+        self.quality = self.levels[self.levels.index(self.quality) + step]
+        set_quality(self.quality)
+        print(f"Pacing: {reason}, quality level {self.quality}")
+        self._recent.clear()
+        self._calm = 0
+        self._settle = SETTLE
+
+    def report(self):
+        """Return how frames kept to their budget as text"""
+        if not self._work:
+            return "Pacing: no frames were timed"
+        work = sorted(self._work)
+        quantiles = statistics.quantiles(work, n=100) \
+            if len(work) > 1 else work * 99
+        return (
+            f"Pacing: {self.frames} frames, {self.late} over budget, "
+            f"work ms of the last minute p50 {quantiles[49] * 1000:.2f}"
+            f"  p99 {quantiles[98] * 1000:.2f}"
+            f"  max {work[-1] * 1000:.2f}, quality level {self.quality}"
+        )
@@ -0,0 +1,127 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Explosion debris, kept in NumPy arrays instead of sprites."""
+
+import numpy
+import pygame
+
+# most particles alive at once
+CAPACITY = 4096
+# pixels per frame added to the falling speed every frame
+GRAVITY = 0.04
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class ParticleSystem:
+    """A fixed pool of particles that are updated and drawn all at once.
+
+    Positions, velocities, lifetimes and colors are rows of arrays that
+    are allocated up front, so there is no object per particle and a
+    frame is a handful of array operations however many are alive.
+    """
+    # off unless asked for, the original game has no debris. A scene
+    # only builds a particle system while it is on
+    enabled = False
+    # share of the particles asked for that are emitted, the pacing
+    # governor lowers it when frames run late
+    density = 1.0
+
+    def __init__(self, capacity=CAPACITY, seed=None):
+        self.position = numpy.zeros((capacity, 2), numpy.float32)
+        self.velocity = numpy.zeros((capacity, 2), numpy.float32)
+        # frames left to live, 0 for a free row
+        self.life = numpy.zeros(capacity, numpy.int16)
+        # index into the palette
+        self.color = numpy.zeros(capacity, numpy.uint8)
+        self._palette = []
+        self._rng = numpy.random.default_rng(seed)
+        # what particles are drawn onto when the screen is recorded
+        self._layer = None
+        # the part of the layer the last particles were written to
+        self._drawn = None
+
+    def __len__(self):
+        return int(numpy.count_nonzero(self.life))
+
+    def emit(self, position, count, color=(255, 255, 255),
+             speed=1.0, life=30):
+        """Burst up to count particles out of position"""
+        count = round(count * self.density)
+        if count == 0:
+            return
+        rows = numpy.flatnonzero(self.life == 0)[:count]
+        if len(rows) == 0:
+            return
+        angle = self._rng.uniform(0.0, 2 * numpy.pi, len(rows))
+        magnitude = self._rng.uniform(0.2, 1.0, len(rows)) * speed
+        self.position[rows] = position
+        self.velocity[rows, 0] = numpy.cos(angle) * magnitude
+        self.velocity[rows, 1] = numpy.sin(angle) * magnitude
+        self.life[rows] = self._rng.integers(life // 2, life + 1, len(rows))
+        self.color[rows] = self._color_index(color)
+
+    def update(self):
+        """Move every particle one frame"""
+        if not self.life.any():
+            return
+        # free rows are moved as well, it is cheaper than picking them out
+        self.position += self.velocity
+        self.velocity[:, 1] += GRAVITY
+        numpy.subtract(self.life, 1, out=self.life, where=self.life > 0)
+
+    def draw(self, surf):
+        """Draw every particle as a pixel on surf"""
+        rows = numpy.flatnonzero(self.life)
+        if len(rows) == 0:
+            return
+        x = self.position[rows, 0].astype(numpy.intp)
+        y = self.position[rows, 1].astype(numpy.intp)
+        width, height = surf.get_size()
+        inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        x, y, colors = x[inside], y[inside], self.color[rows][inside]
+        if len(x) == 0:
+            return
+
+        if isinstance(surf, pygame.Surface):
+            self._write(surf, x, y, colors)
+            return
+        # a recorded screen has no pixels to write to, so the particles
+        # go onto a layer kept by the renderer, and only the part of it
+        # that changed is sent again
+        if self._layer is None:
+            self._layer = pygame.Surface((width, height))
+            self._layer.set_colorkey([0, 0, 0])
+        drawn = pygame.Rect(
+            x.min(), y.min(), x.max() - x.min() + 1, y.max() - y.min() + 1
+        )
+        changed = drawn
+        if self._drawn is not None:
+            self._layer.fill([0, 0, 0], self._drawn)
+            changed = drawn.union(self._drawn)
+        self._write(self._layer, x, y, colors)
+        self._drawn = drawn
+        surf.update(self._layer, changed)
+        surf.blit(self._layer, drawn.topleft, drawn)
+
+    def clear(self):
+        """Remove every particle"""
+        self.life[:] = 0
+
+    def _write(self, surf, x, y, colors):
+        """Write the pixels of the particles straight into surf"""
+        mapped = numpy.array(
+            [surf.map_rgb(color) for color in self._palette], numpy.uint32
+        )
+        pixels = pygame.surfarray.pixels2d(surf)
+        pixels[x, y] = mapped[colors]
+        # unlocks surf
+        del pixels
+
+    def _color_index(self, color):
+        """Return the palette index of color, adding it if it is new"""
+        color = tuple(color)
+        if color not in self._palette:
+            self._palette.append(color)
+        return self._palette.index(color)
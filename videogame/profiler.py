@@ -0,0 +1,153 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Profiles of a window of frames of one scene, taken while the game
+runs.
+
+A window is started by F12 on a running cabinet, or by --profile for
+the first scene of a class, and lasts for a number of frames or until
+the scene ends. Over the window cProfile times every call on the main
+thread, and a sampling thread takes the stack of every thread each
+millisecond. Each sample is tagged with the scene class and the part
+of it being played, loading, march, endgame or game over for a game,
+so a hot spot that only shows in one part stands out on its own.
+
+The window is written as a .pstats file for pstats or snakeviz, and as
+collapsed stacks, one line of ";" separated frames and a count per
+stack, for flamegraph.pl or speedscope. The sampler only sees Python
+frames, and its counts include cProfile's own overhead, which is about
+the same for every call.
+"""
+
+import collections
+import cProfile
+import os
+import sys
+import threading
+import time
+
+# seconds between samples of the stacks
+SAMPLE_INTERVAL = 0.001
+
+
+class Sampler(threading.Thread):
+    """Takes the stack of every other thread now and then, and counts
+    them under the tag of the moment"""
+
+    def __init__(self, tag):
+        super().__init__(name="profiler", daemon=True)
+        self.stacks = collections.Counter()
+        self._tag = tag
+        self._stopped = threading.Event()
+
+    def run(self):
+        # a thread busy running Python only lets go of the GIL every
+        # switch interval, 5 ms by default, which is longer than most
+        # of the work of a frame, so the samples would only ever catch
+        # it waiting
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(SAMPLE_INTERVAL / 4)
+        try:
+            self._sample()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def _sample(self):
+        """Sample until stopped"""
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            tag = self._tag()
+            names = {thread.ident: thread.name
+                     for thread in threading.enumerate()}
+            # I know what I'm doing, linter.
+            # pylint: disable-next=protected-access
+            for ident, frame in sys._current_frames().items():
+                if ident != self.ident:
+                    self.stacks[";".join(
+                        (*tag, names.get(ident, str(ident)),
+                         *reversed(_stack(frame)))
+                    )] += 1
+
+    def stop(self):
+        """Take no more samples"""
+        self._stopped.set()
+        self.join()
+
+
+def _stack(frame):
+    """Return the calls of a stack from the innermost out"""
+    calls = []
+    while frame is not None:
+        code = frame.f_code
+        calls.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}"
+            f":{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+    return calls
+
+
+class FrameProfiler:
+    """Profiles windows of frames, started by hand or when a scene of
+    the class asked for first plays"""
+
+    def __init__(self, frames, directory, scene_name=None):
+        self.frames = frames
+        self.directory = directory
+        self._wanted = scene_name
+        self._scene = None
+        self._left = 0
+        self._profile = None
+        self._sampler = None
+
+    def frame(self, scene, start=False):
+        """Note that a frame of scene begins, ending the window once it
+        is over and starting one when asked to"""
+        if self._scene is not None:
+            self._left -= 1
+            if scene is not self._scene or self._left <= 0:
+                self.finish()
+        if self._scene is None and (
+                start or type(scene).__name__ == self._wanted):
+            self._wanted = None
+            self._start(scene)
+
+    def _start(self, scene):
+        """Begin a window of frames of scene"""
+        print(f"Profiling {self.frames} frames of {type(scene).__name__}")
+        self._scene = scene
+        self._left = self.frames
+        self._sampler = Sampler(self._tag)
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _tag(self):
+        """Return what the samples of the moment are tagged with"""
+        scene = self._scene
+        if scene is None:
+            return ()
+        phase = scene.phase()
+        if phase is None:
+            return (type(scene).__name__,)
+        return (type(scene).__name__, phase)
+
+    def finish(self):
+        """End the window, if there is one, and write it out"""
+        if self._scene is None:
+            return
+        self._profile.disable()
+        self._sampler.stop()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory,
+            f"{type(self._scene).__name__}-{time.strftime('%Y%m%d-%H%M%S')}"
+        )
+        self._profile.dump_stats(path + ".pstats")
+        with open(path + ".collapsed", "w", encoding="utf-8") as collapsed:
+            for stack, count in sorted(self._sampler.stacks.items()):
+                collapsed.write(f"{stack} {count}\n")
+        print(f"Profile of {self.frames - self._left} frames written to "
+              f"{path}.pstats and {path}.collapsed")
+        self._scene = None
+        self._profile = None
+        self._sampler = None
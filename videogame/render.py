@@ -0,0 +1,407 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Recording of frames as immutable snapshots of draw commands."""
+
+import itertools
+import threading
+from collections import namedtuple
+
+import pygame
+from pygame._sdl2 import video
+
+# frame: the number of the scene step that produced the snapshot
+# uploads: tuple of (key, pixels, size, format, colorkey) for sources
+#   that are new since the last snapshot
+# patches: tuple of (key, pixels, rect, format, colorkey) for the parts
+#   of sources sent before whose pixels changed
+# releases: tuple of keys whose sources are no longer drawn
+# commands: tuple of (surface method name, arguments) to replay,
+#   blits name their source by key
+# valid: False once the scene has finished
+Snapshot = namedtuple(
+    'Snapshot',
+    ['frame', 'uploads', 'patches', 'releases', 'commands', 'valid']
+)
+
+# frames a source may go unused before the renderer lets go of it
+SOURCE_LIFETIME = 120
+
+# SDL_BlendMode values, pygame does not name them
+BLENDMODE_NONE = 0
+BLENDMODE_BLEND = 1
+BLENDMODE_MOD = 4
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class DisplayList:
+    """Stand-in for the screen surface that records what is drawn on it.
+
+    Scenes draw onto a display list exactly like onto the screen. Each
+    source surface is sent to the renderer once, as plain pixel data,
+    and is referred to by key after that. The renderer thread never
+    touches a surface owned by the simulation thread, which matters
+    because SDL links blit sources and destinations together and
+    freeing one on another thread in the middle of a blit corrupts
+    that link.
+    """
+
+    def __init__(self, size):
+        self._rect = pygame.Rect((0, 0), size)
+        self._commands = []
+        self._uploads = []
+        self._patches = []
+        self._releases = []
+        # source surface -> [key, frame it was last drawn]
+        self._sources = {}
+        self._keys = itertools.count()
+        # counts snapshots, unlike the frame number of a snapshot this
+        # keeps going up across scenes
+        self._age = 0
+
+    def get_width(self):
+        """Width of the recorded screen"""
+        return self._rect.width
+
+    def get_height(self):
+        """Height of the recorded screen"""
+        return self._rect.height
+
+    def get_size(self):
+        """Size of the recorded screen"""
+        return self._rect.size
+
+    def get_rect(self):
+        """Rect of the recorded screen"""
+        return self._rect.copy()
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        """Record a blit of source"""
+        if area is not None:
+            area = pygame.Rect(area)
+        self._commands.append(
+            ('blit', (self._key(source), tuple(dest), area, special_flags))
+        )
+
+    def fill(self, color, rect=None, special_flags=0):
+        """Record a fill"""
+        if rect is not None:
+            rect = pygame.Rect(rect)
+        self._commands.append(('fill', (color, rect, special_flags)))
+
+    def forget(self, source):
+        """Drop a source whose pixels changed, so they are sent again
+        the next time it is drawn"""
+        entry = self._sources.pop(source, None)
+        if entry is not None:
+            self._releases.append(entry[0])
+
+    def update(self, source, rect):
+        """Send rect of a source again after its pixels changed there,
+        a source that was never drawn is sent whole when it is"""
+        entry = self._sources.get(source)
+        if entry is None:
+            return
+        rect = pygame.Rect(rect).clip(source.get_rect())
+        if not rect.width or not rect.height:
+            return
+        pixel_format = _pixel_format(source)
+        self._patches.append((
+            entry[0],
+            pygame.image.tobytes(source.subsurface(rect), pixel_format),
+            rect, pixel_format, source.get_colorkey()
+        ))
+
+    def _key(self, source):
+        """Return the key of source, sending its pixels if it is new"""
+        entry = self._sources.get(source)
+        if entry is None:
+            entry = [next(self._keys), self._age]
+            self._sources[source] = entry
+            pixel_format = _pixel_format(source)
+            self._uploads.append((
+                entry[0], pygame.image.tobytes(source, pixel_format),
+                source.get_size(), pixel_format, source.get_colorkey()
+            ))
+        entry[1] = self._age
+        return entry[0]
+
+    def snapshot(self, frame, valid=True):
+        """Return everything recorded so far as a snapshot and start over"""
+        self._age += 1
+        if self._age % SOURCE_LIFETIME == 0:
+            for source, (key, last_used) in list(self._sources.items()):
+                if self._age - last_used > SOURCE_LIFETIME:
+                    del self._sources[source]
+                    self._releases.append(key)
+
+        snapshot = Snapshot(
+            frame, tuple(self._uploads), tuple(self._patches),
+            tuple(self._releases), tuple(self._commands), valid
+        )
+        self._uploads.clear()
+        self._patches.clear()
+        self._releases.clear()
+        self._commands.clear()
+        return snapshot
+
+
+class Presenter:
+    """Draws snapshots onto the screen, on the thread that owns it.
+
+    With a scale above 1 the screen is that many times the size of the
+    recorded screen. Sources are scaled up once when they arrive and
+    every command is drawn at the scaled position, so nothing has to
+    scale the whole frame.
+    """
+
+    def __init__(self, screen: pygame.Surface, scale=1):
+        self._screen = screen
+        self._scale = scale
+        self._sources = {}
+
+    def draw(self, snapshot):
+        """Draw every command of snapshot onto the screen"""
+        for key, pixels, size, pixel_format, colorkey in snapshot.uploads:
+            source = pygame.image.frombytes(pixels, size, pixel_format)
+            if pixel_format == 'RGBA':
+                source = source.convert_alpha()
+            else:
+                source = source.convert()
+            if self._scale != 1:
+                source = pygame.transform.scale_by(source, self._scale)
+            if colorkey is not None:
+                source.set_colorkey(colorkey)
+            self._sources[key] = source
+
+        for key, pixels, rect, pixel_format, _ in snapshot.patches:
+            self._patch(
+                key, pygame.image.frombytes(pixels, rect.size, pixel_format),
+                rect
+            )
+
+        for name, args in snapshot.commands:
+            if self._scale != 1:
+                args = self._scaled(name, args)
+            if name == 'blit':
+                args = (self._sources[args[0]],) + args[1:]
+            getattr(self._screen, name)(*args)
+
+        for key in snapshot.releases:
+            del self._sources[key]
+
+    def frame(self):
+        """Return a surface with what was drawn"""
+        return self._screen
+
+    @staticmethod
+    def present():
+        """Show what was drawn"""
+        pygame.display.update()
+
+    def _patch(self, key, patch, rect):
+        """Copy patch over rect of a source, alpha and all"""
+        if self._scale != 1:
+            patch = pygame.transform.scale_by(patch, self._scale)
+            rect = _scale_rect(rect, self._scale)
+        source = self._sources[key]
+        if patch.get_flags() & pygame.SRCALPHA:
+            # copied over what was there, not blended with it
+            source.fill((0, 0, 0, 0), rect)
+            source.blit(patch, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            source.blit(patch, rect)
+
+    def _scaled(self, name, args):
+        """Return the arguments of a command scaled to the screen"""
+        if name == 'blit':
+            key, dest, area, special_flags = args
+            dest = (dest[0] * self._scale, dest[1] * self._scale)
+            if area is not None:
+                area = _scale_rect(area, self._scale)
+            return (key, dest, area, special_flags)
+        color, rect, special_flags = args
+        if rect is not None:
+            rect = _scale_rect(rect, self._scale)
+        return (color, rect, special_flags)
+
+
+class TexturePresenter:
+    """Draws snapshots with an SDL renderer instead of surface blits.
+
+    Every source is uploaded once as a texture and frames are drawn
+    from it by rect. The gel overlays are a white texture modulated by
+    the gel color and multiplied onto the frame, so none of the pixel
+    work happens on the CPU unless SDL falls back to its software
+    renderer.
+    """
+
+    def __init__(self, window: video.Window, size, vsync=False):
+        try:
+            self._renderer = video.Renderer(
+                window, accelerated=-1, vsync=vsync, target_texture=True
+            )
+        except video.error:
+            # no usable GPU driver, the software renderer always works
+            self._renderer = video.Renderer(
+                window, accelerated=0, vsync=vsync, target_texture=True
+            )
+        self._renderer.logical_size = size
+        self._renderer.draw_blend_mode = BLENDMODE_NONE
+        self._rect = pygame.Rect((0, 0), size)
+        # frames are drawn onto a canvas texture so that whatever a frame
+        # does not draw over stays, just like on a display surface
+        self._canvas = video.Texture(self._renderer, size, target=True)
+        white = pygame.Surface((1, 1))
+        white.fill("white")
+        self._gel = video.Texture.from_surface(self._renderer, white)
+        self._gel.blend_mode = BLENDMODE_MOD
+        self._textures = {}
+        # keys of the textures that patches can be drawn onto
+        self._targets = set()
+        # what frame() reads the canvas back into
+        self._frame = None
+
+    def draw(self, snapshot):
+        """Draw every command of snapshot onto the canvas"""
+        self._renderer.target = self._canvas
+        for key, pixels, size, pixel_format, colorkey in snapshot.uploads:
+            source = pygame.image.frombytes(pixels, size, pixel_format)
+            if colorkey is not None:
+                source.set_colorkey(colorkey)
+            self._textures[key] = video.Texture.from_surface(
+                self._renderer, source
+            )
+
+        for key, pixels, rect, pixel_format, colorkey in snapshot.patches:
+            patch = pygame.image.frombytes(pixels, rect.size, pixel_format)
+            if colorkey is not None:
+                patch.set_colorkey(colorkey)
+            self._patch(key, patch, rect)
+        self._renderer.target = self._canvas
+
+        for name, args in snapshot.commands:
+            getattr(self, '_' + name)(*args)
+
+        for key in snapshot.releases:
+            del self._textures[key]
+            self._targets.discard(key)
+        self._renderer.target = None
+
+    def frame(self):
+        """Return a surface with what was drawn, read back from the
+        canvas, which is slow on a GPU"""
+        if self._frame is None:
+            self._frame = pygame.Surface(self._rect.size, depth=32)
+        self._renderer.target = self._canvas
+        self._renderer.to_surface(self._frame)
+        self._renderer.target = None
+        return self._frame
+
+    def present(self):
+        """Show the canvas, scaled to the window"""
+        self._renderer.draw_color = pygame.Color("black")
+        self._renderer.clear()
+        self._canvas.draw()
+        self._renderer.present()
+
+    def _patch(self, key, patch, rect):
+        """Draw patch over rect of a texture, alpha and all"""
+        texture = self._textures[key]
+        if key not in self._targets:
+            # a texture made from a surface cannot be drawn onto, so it
+            # is copied onto one that can the first time it is patched
+            target = video.Texture(
+                self._renderer, texture.get_rect().size, target=True
+            )
+            target.blend_mode = BLENDMODE_BLEND
+            texture.blend_mode = BLENDMODE_NONE
+            self._renderer.target = target
+            texture.draw()
+            self._textures[key] = texture = target
+            self._targets.add(key)
+        piece = video.Texture.from_surface(self._renderer, patch)
+        piece.blend_mode = BLENDMODE_NONE
+        self._renderer.target = texture
+        piece.draw(dstrect=rect)
+
+    def _blit(self, key, dest, area=None, special_flags=0):
+        """Draw area of a texture at dest"""
+        if special_flags:
+            raise ValueError("The texture backend cannot blit with flags")
+        texture = self._textures[key]
+        if area is None:
+            area = texture.get_rect()
+        # a surface blit clips the area to the source, SDL would stretch
+        clipped = area.clip(texture.get_rect())
+        if clipped.width and clipped.height:
+            texture.draw(clipped, pygame.Rect(
+                dest[0] + clipped.x - area.x,
+                dest[1] + clipped.y - area.y,
+                clipped.width, clipped.height
+            ))
+
+    def _fill(self, color, rect=None, special_flags=0):
+        """Fill rect with color, or tint it when multiplying"""
+        if rect is None:
+            rect = self._rect
+        if special_flags == pygame.BLEND_RGB_MULT:
+            self._gel.color = pygame.Color(color)
+            self._gel.draw(dstrect=rect)
+        elif special_flags == 0:
+            self._renderer.draw_color = pygame.Color(color)
+            self._renderer.fill_rect(rect)
+        else:
+            raise ValueError("The texture backend can only fill or multiply")
+
+
+class SnapshotBuffer:
+    """Double buffer of snapshots shared between two threads.
+
+    The simulation publishes into the back slot and swaps, the renderer
+    always reads the front slot, so neither ever waits on the other
+    for longer than the swap.
+    """
+
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+        self._published = threading.Condition()
+
+    def publish(self, snapshot):
+        """Make snapshot the front snapshot"""
+        with self._published:
+            self._slots[1 - self._front] = snapshot
+            self._front = 1 - self._front
+            self._published.notify_all()
+
+    def front(self):
+        """Return the latest published snapshot"""
+        return self._slots[self._front]
+
+    def wait_for(self, frame, timeout=None):
+        """Wait until a snapshot of at least frame was published
+        and return the front snapshot"""
+        with self._published:
+            self._published.wait_for(
+                lambda: (self.front() is not None
+                         and self.front().frame >= frame),
+                timeout
+            )
+            return self.front()
+
+
+def _scale_rect(rect, factor):
+    """Return rect with its position and size multiplied by factor"""
+    return pygame.Rect(
+        rect.x * factor, rect.y * factor,
+        rect.width * factor, rect.height * factor
+    )
+
+
+def _pixel_format(source):
+    """Return the format the pixels of source are sent in"""
+    if source.get_flags() & pygame.SRCALPHA:
+        return 'RGBA'
+    return 'RGB'
@@ -0,0 +1,325 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Binary save states of the game scene, and a rewind buffer of them.
+
+A save state holds everything InvadersGameScene needs to carry on from
+a frame: the formation, bullets, shields, player, score and the random
+number generator. Debris is left out, it only decorates.
+"""
+
+import collections
+import struct
+import zlib
+
+import numpy
+import pygame
+
+from videogame.assets import load_image
+from videogame.sprites import Bullet, Shield
+
+STATE_MAGIC = b'SISV'
+STATE_VERSION = 3
+
+# the only text the game over message is ever a part of
+GAME_OVER_TEXT = "GAME OVER               "
+# line of sight entry of a column without aliens
+NO_ALIEN = 0xffff
+
+_HEADER = struct.Struct('<4sH')
+# frames, score, points to next life, lives, level, credit, hi-score,
+# flags, animation state, game over text length, alien step, aliens
+# left to move across and down, bgm tone and timing
+_SCENE = struct.Struct('<IIIhHHIBBBbHHBH')
+# position x, velocity, shooting, explosion frame, position,
+# sprite frame
+_PLAYER = struct.Struct('<hbBBhh4h')
+# position, grid position, alive, explosion frame, idle frame,
+# sprite frame x
+_ALIEN = struct.Struct('<hhHHBBBB')
+# position, player owned, projectile, explosion frame, move frame,
+# sprite frame x and width
+_BULLET = struct.Struct('<hhBBBBBB')
+# position, sheet width and height
+_SHIELD = struct.Struct('<hhBB')
+# Mersenne Twister state and whether a gauss value is kept
+_RNG = struct.Struct('<625IBd')
+# counts of rows, bullets and shields, wide enough for the formations
+# of the stress test
+_COUNT = struct.Struct('<H')
+# column and row of the alien in a line of sight
+_SIGHT = struct.Struct('<HH')
+# length of the state a delta makes, which the stress test formations
+# take past 64 KiB
+_LENGTH = struct.Struct('<I')
+
+_FLAG_LOADING = 1
+_FLAG_SECRET = 2
+_FLAG_VALID = 4
+_FLAG_EXITING = 8
+
+
+def save(scene):
+    """Return the state of a game scene as bytes"""
+    # I know what I'm doing, linter.
+    # pylint: disable=protected-access
+    flags = (
+        _FLAG_LOADING * scene.loading | _FLAG_SECRET * scene._secret
+        | _FLAG_VALID * scene._is_valid | _FLAG_EXITING * scene.is_exiting
+    )
+    parts = [
+        _HEADER.pack(STATE_MAGIC, STATE_VERSION),
+        _SCENE.pack(
+            scene._frames, scene.p1_score, scene._next_life, scene._lives,
+            scene._level, scene._credit, scene._hi_score, flags,
+            scene._anim_state, len(scene.game_over_txt), scene.alien_move,
+            scene.alien_position_x, scene.alien_position_y,
+            scene.bgm._tone, scene.bgm.timing
+        ),
+    ]
+
+    player = scene.player
+    parts.append(_PLAYER.pack(
+        player.position_x, player.velocity, player.shooting,
+        player.explode_frame, *player.position, *player.rect
+    ))
+    # everything up to here is the same size in every state, so that
+    # the XOR of two states lines up
+    version, internal, gauss = scene.rng.getstate()
+    if version != 3:
+        raise ValueError(f"unknown random state version {version}")
+    parts.append(_RNG.pack(*internal, gauss is not None, gauss or 0.0))
+
+    parts.append(_COUNT.pack(len(scene.alien_line_of_sight)))
+    for sight in scene.alien_line_of_sight:
+        parts.append(_SIGHT.pack(*(sight or (NO_ALIEN, NO_ALIEN))))
+
+    for row in scene.aliens:
+        parts.append(_COUNT.pack(len(row)))
+        for alien in row:
+            parts.append(_ALIEN.pack(
+                *alien.position, *alien.grid_position, alien.is_alive,
+                alien.explode_frame, alien._idle_frame, alien.rect.x
+            ))
+
+    parts.append(_COUNT.pack(len(scene.bullets)))
+    for bullet in scene.bullets:
+        parts.append(_BULLET.pack(
+            *bullet.position, bullet.is_player_owned, bullet._projectile,
+            bullet.explode_frame, bullet._move_frame,
+            bullet.rect.x, bullet.rect.width
+        ))
+
+    parts.append(_COUNT.pack(len(scene.shields)))
+    for shield in scene.shields:
+        parts.append(_SHIELD.pack(*shield.position, *shield.sheet.get_size()))
+        parts.append(_damage_bits(shield.sheet))
+
+    return b''.join(parts)
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-locals,too-many-statements
+def load(scene, state):
+    """Put a game scene back into a state returned by save()"""
+    # pylint: disable=protected-access
+    magic, version = _HEADER.unpack_from(state, 0)
+    if magic != STATE_MAGIC or version != STATE_VERSION:
+        raise ValueError(f"not a version {STATE_VERSION} save state")
+    offset = _HEADER.size
+
+    (scene._frames, scene.p1_score, scene._next_life, scene._lives,
+     scene._level, scene._credit, scene._hi_score, flags,
+     scene._anim_state, game_over_length, scene.alien_move,
+     scene.alien_position_x, scene.alien_position_y,
+     scene.bgm._tone, scene.bgm.timing) = _SCENE.unpack_from(state, offset)
+    offset += _SCENE.size
+    scene.loading = bool(flags & _FLAG_LOADING)
+    scene._secret = bool(flags & _FLAG_SECRET)
+    scene._is_valid = bool(flags & _FLAG_VALID)
+    scene.is_exiting = bool(flags & _FLAG_EXITING)
+    scene.game_over_txt = GAME_OVER_TEXT[:game_over_length]
+
+    player = scene.player
+    (player.position_x, player.velocity, shooting, player.explode_frame,
+     *values) = _PLAYER.unpack_from(state, offset)
+    offset += _PLAYER.size
+    player.shooting = bool(shooting)
+    player.position = tuple(values[:2])
+    player.rect = pygame.Rect(values[2:])
+
+    *internal, has_gauss, gauss = _RNG.unpack_from(state, offset)
+    offset += _RNG.size
+    scene.rng.setstate((3, tuple(internal), gauss if has_gauss else None))
+
+    count, = _COUNT.unpack_from(state, offset)
+    offset += _COUNT.size
+    scene.alien_line_of_sight = []
+    for _ in range(count):
+        sight = _SIGHT.unpack_from(state, offset)
+        offset += _SIGHT.size
+        scene.alien_line_of_sight.append(
+            None if sight == (NO_ALIEN, NO_ALIEN) else sight
+        )
+
+    scene.aliens = []
+    for alien_class in scene.wave.species:
+        count, = _COUNT.unpack_from(state, offset)
+        offset += _COUNT.size
+        row = []
+        for _ in range(count):
+            (x, y, column, line, alive, explode_frame, idle_frame,
+             frame_x) = _ALIEN.unpack_from(state, offset)
+            offset += _ALIEN.size
+            alien = alien_class((x, y), (column, line))
+            alien.is_alive = bool(alive)
+            alien.explode_frame = explode_frame
+            alien._idle_frame = idle_frame
+            alien.rect = pygame.Rect((frame_x, 0, 16, 8))
+            row.append(alien)
+        scene.aliens.append(row)
+
+    count, = _COUNT.unpack_from(state, offset)
+    offset += _COUNT.size
+    scene.bullets = []
+    for _ in range(count):
+        (x, y, player_owned, projectile, explode_frame, move_frame,
+         frame_x, frame_width) = _BULLET.unpack_from(state, offset)
+        offset += _BULLET.size
+        bullet = Bullet((x, y), projectile, bool(player_owned))
+        bullet.explode_frame = explode_frame
+        bullet._move_frame = move_frame
+        bullet.rect = pygame.Rect((frame_x, 0, frame_width, 8))
+        scene.bullets.append(bullet)
+
+    count, = _COUNT.unpack_from(state, offset)
+    offset += _COUNT.size
+    scene.shields = []
+    for _ in range(count):
+        x, y, width, height = _SHIELD.unpack_from(state, offset)
+        offset += _SHIELD.size
+        length = -(-width * height // 8)
+        shield = Shield((x, y))
+        shield.sheet = _damaged_sheet(
+            shield.sheet, state[offset:offset+length]
+        )
+        offset += length
+        scene.shields.append(shield)
+
+    if scene.particles is not None:
+        scene.particles.clear()
+
+
+# shield sheets only change when they are hit, so their bits are kept
+_damage_cache = {}
+
+
+def _damage_bits(sheet):
+    """Return which pixels of a shield sheet are left, one bit each"""
+    bits = _damage_cache.get(sheet)
+    if bits is None:
+        bits = numpy.packbits(
+            pygame.surfarray.array_colorkey(sheet) != 0
+        ).tobytes()
+        if len(_damage_cache) > 64:
+            _damage_cache.clear()
+        _damage_cache[sheet] = bits
+    return bits
+
+
+def _damaged_sheet(sheet, bits):
+    """Return a copy of an undamaged shield sheet with the pixels that
+    are not in bits knocked out"""
+    width, height = sheet.get_size()
+    left = numpy.unpackbits(numpy.frombuffer(bits, numpy.uint8))
+    left = left[:width * height].reshape(width, height).astype(bool)
+    if left.all():
+        return load_image('shield.png')
+    damaged = sheet.copy()
+    pixels = pygame.surfarray.pixels2d(damaged)
+    pixels[~left] = damaged.map_rgb([0, 0, 0])
+    # unlocks damaged
+    del pixels
+    damaged.set_colorkey([0, 0, 0])
+    _damage_cache[damaged] = bytes(bits)
+    return damaged
+
+
+class RewindBuffer:
+    """The last few seconds of save states, one per frame.
+
+    Every keyframe_interval frames a whole state is kept, the frames in
+    between are kept as the zlib compressed XOR against that keyframe,
+    which is mostly zeros. When the buffer is full the oldest keyframe
+    and the frames that depend on it are dropped together.
+    """
+    # off unless asked for
+    enabled = False
+
+    def __init__(self, capacity=600, keyframe_interval=60):
+        self.capacity = capacity
+        self.keyframe_interval = keyframe_interval
+        # segments of [keyframe, deltas against it]
+        self._segments = collections.deque()
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def push(self, state):
+        """Add the state of the newest frame"""
+        if (not self._segments
+                or len(self._segments[-1][1]) + 1 >= self.keyframe_interval):
+            self._segments.append([state, []])
+        else:
+            keyframe, deltas = self._segments[-1]
+            deltas.append(delta(keyframe, state))
+        self._length += 1
+        while self._length > self.capacity and len(self._segments) > 1:
+            dropped = self._segments.popleft()
+            self._length -= 1 + len(dropped[1])
+
+    def latest(self):
+        """Return the state of the newest frame"""
+        keyframe, deltas = self._segments[-1]
+        if not deltas:
+            return keyframe
+        return apply_delta(keyframe, deltas[-1])
+
+    def rewind(self, frames=1):
+        """Forget the newest frames and return the state that is the
+        newest after that. The oldest frame is never forgotten."""
+        for _ in range(min(frames, self._length - 1)):
+            segment = self._segments[-1]
+            if segment[1]:
+                segment[1].pop()
+            else:
+                self._segments.pop()
+            self._length -= 1
+        return self.latest()
+
+    def clear(self):
+        """Forget every frame"""
+        self._segments.clear()
+        self._length = 0
+
+
+def delta(old, new):
+    """Return what changed from state old to state new, compressed.
+    States mostly keep their layout from frame to frame, so the XOR of
+    two of them is mostly zeros."""
+    return _LENGTH.pack(len(new)) + zlib.compress(_xor(old, new), 1)
+
+
+def apply_delta(old, changes):
+    """Return the state that delta() was given along with old"""
+    length, = _LENGTH.unpack_from(changes, 0)
+    return _xor(old, zlib.decompress(changes[_LENGTH.size:]))[:length]
+
+
+def _xor(first, second):
+    """XOR two byte strings, the shorter one padded with zeros"""
+    length = max(len(first), len(second))
+    return (
+        int.from_bytes(first, 'little') ^ int.from_bytes(second, 'little')
+    ).to_bytes(length, 'little')
@@ -6,15 +6,35 @@
 import random
 from typing import List
 import pygame
-from videogame import save_scores, load_scores
+from videogame import (
+    indexed, netplay, save_scores, load_scores, savestate, waves
+)
+from videogame.autopilot import Autopilot
+from videogame.collision import contact
+from videogame.controls import (
+    DEFAULT_BINDINGS, NO_CONTROLS, InputState, combine
+)
+from videogame.particles import ParticleSystem
 from videogame.sound import (
     BGM, DeathSFX, ExplodeSFX,
-    PowerUpSFX, ShootSFX
+    PowerUpSFX, ShootSFX, Sound
 )
 from videogame.sprites import (
     Bullet, Cuttlefish, Shield, Crab,
     Font, Octopus, Player, Squid
 )
+from videogame.telemetry import DEATH, EXTRA_LIFE, KILL, SHOT, SPECIES, WAVE
+
+# frames the title sits still before the demo plays
+ATTRACT_AFTER = 60 * 15
+# frames the demo plays at most
+ATTRACT_LENGTH = 60 * 45
+# aliens left when the march turns into the endgame, as fast as it goes
+ENDGAME_ALIENS = 8
+# frames a scene that only input changes stays idle for
+IDLE_FOREVER = float("inf")
+# the rows, top and bottom, that the scores, lives and credits are in
+HUD_ROWS = ((8, 40), (240, 256))
 
 
 # I know what I'm doing, linter.
@@ -22,6 +42,12 @@ from videogame.sprites import (
 class Scene:
     """Base class for the game."""
 
+    # frames between redraws of the scores, lives and credits, and if
+    # the colored gel is laid over the screen. The pacing governor turns
+    # these down when frames run late
+    hud_interval = 1
+    color_gel = True
+
     def __init__(self, screen: pygame.Surface, soundtrack=None):
         """Scene initializer"""
         self._screen = screen
@@ -30,6 +56,8 @@ class Scene:
         self.is_exiting = False
         self._soundtrack = soundtrack
         self._render_updates = None
+        self._hud = None
+        self._hud_age = 0
 
         self._secret = False
         self._frames = 0
@@ -42,28 +70,58 @@ class Scene:
 
     def draw(self):
         """Draw the scene."""
-        # Draw persistant UI
-        Font().draw(self._screen, (8, 8), text="SCORE<1> HI-SCORE SCORE<2>")
-        Font().draw(self._screen, (24, 24), text=str(self.p1_score).zfill(4))
-        Font().draw(self._screen, (88, 24), text=str(self._hi_score).zfill(4))
-        Font().draw(self._screen, (168, 24), text="0000")
+        if self.hud_interval <= 1:
+            self._draw_hud(self._screen)
+            return
+        # drawn onto a layer every few frames, and the layer every frame
+        self._hud_age += 1
+        if self._hud is None or self._hud_age >= self.hud_interval:
+            self._hud_age = 0
+            if self._hud is None:
+                self._hud = pygame.Surface(self._screen.get_size())
+                if indexed.is_indexed(self._screen):
+                    self._hud = indexed.surface(self._screen.get_size())
+                self._hud.set_colorkey((0, 0, 0))
+            self._hud.fill((0, 0, 0))
+            self._draw_hud(self._hud)
+            if not isinstance(self._screen, pygame.Surface):
+                for band in self._hud_bands():
+                    self._screen.update(self._hud, band)
+        # the rest of the layer is see through
+        for band in self._hud_bands():
+            self._screen.blit(self._hud, band.topleft, band)
+
+    def _hud_bands(self):
+        """Return the rects of the screen the HUD is drawn in"""
+        width = self._screen.get_width()
+        return [
+            pygame.Rect(0, top, width, bottom - top)
+            for top, bottom in HUD_ROWS
+        ]
+
+    def _draw_hud(self, surf):
+        """Draw the persistant UI onto surf."""
+        Font().draw(surf, (8, 8), text="SCORE<1> HI-SCORE SCORE<2>")
+        Font().draw(surf, (24, 24), text=str(self.p1_score).zfill(4))
+        Font().draw(surf, (88, 24), text=str(self._hi_score).zfill(4))
+        Font().draw(surf, (168, 24), text="0000")
         if self._secret:
-            Font().draw(self._screen, (80, 32), text="LULZSUN")
+            Font().draw(surf, (80, 32), text="LULZSUN")
         Font().draw(
-            self._screen, (8, 240), text=str(max(min(self._lives, 99), 0))
+            surf, (8, 240), text=str(max(min(self._lives, 99), 0))
         )
         # Draw lives
         for i in range(min(self._lives-1, 6)):
-            Player().draw(self._screen, (24+(i*16), 240))
+            Player().draw(surf, (24+(i*16), 240))
 
         Font().draw(
-            self._screen, (136, 240),
+            surf, (136, 240),
             text=f"CREDIT {str(self._credit).zfill(2)}"
         )
 
-    def process_event(self, event):
-        """Process a game event by the scene."""
-        if event.type == pygame.QUIT:
+    def handle_input(self, controls):
+        """Handle the controls of a frame by the scene."""
+        if controls.quit:
             print("Good Bye!")
             self.next_scene()
             self.is_exiting = True
@@ -80,29 +138,23 @@ class Scene:
 
     def render_updates(self):
         """Render all sprite updates."""
+        if not self.color_gel:
+            return
         # create a color overlay in certain areas of the screen
         # this mimics 1978 space invaders coloring
-        overlay_rect = pygame.Surface(
-            (self._screen.get_width(), 32), pygame.SRCALPHA
-        )
-        overlay_rect.fill((254, 30, 30))
-        self._screen.blit(
-            overlay_rect, (0, 32), special_flags=pygame.BLEND_RGB_MULT
-        )
-
-        overlay_rect = pygame.Surface(
-            (self._screen.get_width(), 56), pygame.SRCALPHA
-        )
-        overlay_rect.fill((30, 254, 30))
-        self._screen.blit(
-            overlay_rect, (0, 184), special_flags=pygame.BLEND_RGB_MULT
-        )
-
-        overlay_rect = pygame.Surface((111, 16), pygame.SRCALPHA)
-        overlay_rect.fill((30, 254, 30))
-        self._screen.blit(
-            overlay_rect, (25, 240), special_flags=pygame.BLEND_RGB_MULT
-        )
+        for gel, rect in (
+            ((254, 30, 30), (0, 32, self._screen.get_width(), 32)),
+            ((30, 254, 30), (0, 184, self._screen.get_width(), 56)),
+            ((30, 254, 30), (25, 240, 111, 16)),
+        ):
+            if indexed.is_indexed(self._screen):
+                # an 8-bit screen has the colors under the gels in its
+                # palette already
+                indexed.lay_gel(self._screen, gel, rect)
+            else:
+                self._screen.fill(
+                    gel, rect, special_flags=pygame.BLEND_RGB_MULT
+                )
 
     def update_scene(self):
         """Update the scene state."""
@@ -130,9 +182,7 @@ class Scene:
             pygame.mixer.music.stop()
             self._soundtrack = None
 
-        bottom = pygame.Surface((self._frames, 239-32))
-        bottom.fill((0, 0, 0))
-        self._screen.blit(bottom, (0, 32))
+        self._screen.fill((0, 0, 0), (0, 32, self._frames, 239-32))
 
         if self._frames >= self._screen.get_width():
             self._frames = 0
@@ -143,16 +193,35 @@ class Scene:
         """Return the frame rate the scene desires."""
         return self._frame_rate
 
+    def phase(self):
+        """Return the part of the scene being played, for the profiler,
+        None for scenes that have no parts."""
+        return None
+
+    def idle_frames(self):
+        """Return for how many frames the scene would draw the same
+        frame again unless there is input, 0 while it is changing."""
+        return 0
+
+    def skip_frames(self, frames):
+        """Let frames pass that were not played while the scene was
+        idle."""
+        self._frames += frames
+
 
 class CreditScene(Scene):
     """Scene of my credits unrelated to space invaders"""
 
-    def process_event(self, event):
-        """Process a game event by the scene."""
-        super().process_event(event)
-        if event.type == pygame.KEYDOWN:
+    def handle_input(self, controls):
+        """Handle the controls of a frame by the scene."""
+        super().handle_input(controls)
+        if controls.any_key:
             self.next_scene()
 
+    def idle_frames(self):
+        """Idle once drawn, until a key is pressed."""
+        return IDLE_FOREVER if self._frames else 0
+
     def draw(self):
         Font().draw(
             self._screen, (68, 64),
@@ -188,12 +257,16 @@ class CreditScene(Scene):
 class ControlsScene(Scene):
     """Scene of my controls unrelated to space invaders"""
 
-    def process_event(self, event):
-        """Process a game event by the scene."""
-        super().process_event(event)
-        if event.type == pygame.KEYDOWN:
+    def handle_input(self, controls):
+        """Handle the controls of a frame by the scene."""
+        super().handle_input(controls)
+        if controls.any_key:
             self.next_scene()
 
+    def idle_frames(self):
+        """Idle once drawn, until a key is pressed."""
+        return IDLE_FOREVER if self._frames else 0
+
     def draw(self):
         Font().draw(
             self._screen, (60, 64),
@@ -246,17 +319,30 @@ class TitleScene(Scene):
         ]
         self._anim_state = 0
         self._strings = [''] * len(self._constant_strings)
+        # set when nobody pressed anything for a while
+        self.is_idle = False
 
-    def process_event(self, event):
-        """Process a game event by the scene."""
-        super().process_event(event)
-        if event.type == pygame.KEYDOWN:
+    def handle_input(self, controls):
+        """Handle the controls of a frame by the scene."""
+        super().handle_input(controls)
+        if controls.any_key:
             self.next_scene()
 
+    def idle_frames(self):
+        """Idle once the title is typed out, until the demo is due."""
+        if self._anim_state < len(self._constant_strings):
+            return 0
+        return max(ATTRACT_AFTER - 1 - self._frames, 0)
+
     def update_scene(self):
         """Update scene state."""
         super().update_scene()
 
+        if self._frames >= ATTRACT_AFTER:
+            self.is_idle = True
+            self.next_scene()
+            return
+
         # animating the type writer effect
         if self._frames % (self.frame_rate() / 12) == 0:
             if (
@@ -306,41 +392,39 @@ class LeaderboardScene(Scene):
         self._leaderboard = load_scores()
         self._top_5_txt = ['', '', '', '', '']
 
-    def process_event(self, event):
-        """Process a game event by the scene."""
-        super().process_event(event)
-        if self.name_char_index == 3:
-            self._leaderboard.append((self.current_name, self.hi_score))
-            save_scores(self._leaderboard)
+    def handle_input(self, controls):
+        """Handle the controls of a frame by the scene. The score is
+        saved as soon as the last letter of the name is picked."""
+        super().handle_input(controls)
+        if self.name_char_index == 3 or self._top_5_txt[4] == "":
             return
+        if "left" in controls.pressed:
+            self._change_char(-1)
+        if "right" in controls.pressed:
+            self._change_char(1)
+        if "fire" in controls.pressed:
+            self.name_char_index += 1
+            if self.name_char_index == 3:
+                self._leaderboard.append((self.current_name, self.hi_score))
+                save_scores(self._leaderboard)
+                self.next_scene()
+
+    def _change_char(self, step):
+        """Step the letter being picked through the alphabet, round
+        from z to a and back"""
         current_char = self.current_name[self.name_char_index]
-        if event.type == pygame.KEYDOWN and self._top_5_txt[4] != "":
-            if event.key == pygame.K_SPACE:
-                self.name_char_index += 1
-                if self.name_char_index == 3:
-                    self.next_scene()
-            if event.key in {pygame.K_a, pygame.K_LEFT}:
-                if current_char == 'a':
-                    current_char = 'z'
-                else:
-                    current_char = chr(ord(current_char) - 1)
-                updated_name = (
-                    self.current_name[:self.name_char_index] +
-                    current_char +
-                    self.current_name[self.name_char_index+1:]
-                )
-                self.current_name = updated_name
-            if event.key in {pygame.K_d, pygame.K_RIGHT}:
-                if current_char == 'z':
-                    current_char = 'a'
-                else:
-                    current_char = chr(ord(current_char) + 1)
-                updated_name = (
-                    self.current_name[:self.name_char_index] +
-                    current_char +
-                    self.current_name[self.name_char_index+1:]
-                )
-                self.current_name = updated_name
+        current_char = chr((ord(current_char) - ord('a') + step) % 26
+                           + ord('a'))
+        self.current_name = (
+            self.current_name[:self.name_char_index] +
+            current_char +
+            self.current_name[self.name_char_index+1:]
+        )
+
+    def idle_frames(self):
+        """Idle once the leaderboard is typed out, between the letters
+        of the name."""
+        return IDLE_FOREVER if self._top_5_txt[4] else 0
 
     def update_scene(self):
         """Update scene state."""
@@ -380,21 +464,35 @@ class LeaderboardScene(Scene):
                 self._screen, (56, 176+8),
                 text=f"    {self.current_name}   {str(self.hi_score).zfill(4)}"
             )
-            carat = pygame.Surface((8, 1))
-            carat.fill((255, 255, 255))
             if self.name_char_index != 3:
-                self._screen.blit(
-                    carat, (87+(self.name_char_index*8), 194)
+                self._screen.fill(
+                    (255, 255, 255), (87+(self.name_char_index*8), 194, 8, 1)
                 )
             Font().draw(self._screen, (64, 208), text="Enter  name")
         super().draw()
 
 
+# I know what I'm doing, linter.
+# pylint: disable-next=unused-argument
+def ignore_phase(name):
+    """Stands in for whatever times the phases of update_scene"""
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=unused-argument
+def ignore_event(kind, detail=0, value=0):
+    """Stands in for whatever records the events of a game"""
+
+
 # I know what I'm doing, linter.
 # pylint: disable-next=too-many-instance-attributes
 class InvadersGameScene(Scene):
     """Scene with the actual gameplay of space invaders"""
 
+    # a wave can be set up in one frame instead of being shown a piece
+    # a frame, for runs nobody watches
+    animate_waves = True
+
     def __init__(self, screen, soundtrack=None):
         """Initialize the scene."""
         super().__init__(screen, soundtrack)
@@ -414,6 +512,7 @@ class InvadersGameScene(Scene):
             List[Octopus], List[Octopus]
         ]
         self.aliens = [[], [], [], [], []]
+        self.wave = waves.played
         self.alien_move = 2
         self.alien_position_x = 0
         self.alien_position_y = 0
@@ -424,86 +523,113 @@ class InvadersGameScene(Scene):
         self.bullets: List[Bullet]
         self.bullets = []
 
-    def process_event(self, event):
-        """Process game events."""
-        super().process_event(event)
+        # own generator, so that a save state can carry its state. The
+        # debris is seeded alike, for runs to play the same every time
+        seed = random.getrandbits(32)
+        self.rng = random.Random(seed)
+        self.particles = None
+        if ParticleSystem.enabled:
+            self.particles = ParticleSystem(seed=seed)
+        self.history = None
+        if savestate.RewindBuffer.enabled:
+            self.history = savestate.RewindBuffer()
+        self._rewinding = False
+        # streams the game to other machines when hosting
+        self.host = None
+        self._remote_input = InputState(keyboard=False)
+        # of this frame, from the local player
+        self.controls = NO_CONTROLS
+        # told which part of update_scene runs next, by the stress test
+        self.enter_phase = ignore_phase
+        # told what happens in the game, by the telemetry
+        self.record_event = ignore_event
+
+    def debris(self, sprite, count, speed=1.0, life=30):
+        """Burst particles out of the middle of a sprite"""
+        if self.particles is None:
+            return
+        self.particles.emit((
+            sprite.position[0] + sprite.rect.width / 2,
+            sprite.position[1] + sprite.rect.height / 2
+        ), count, speed=speed, life=life)
+
+    def collide_bullets(self, starts):
+        """Blow up the player's bullet and an alien bullet that ran into
+        each other on their way from starts"""
+        for shot in self.bullets:
+            if not shot.is_player_owned or shot.explode_frame != 0:
+                continue
+            for bullet in self.bullets:
+                if bullet.is_player_owned or bullet.explode_frame != 0:
+                    continue
+                if contact(
+                    shot, starts.get(shot, shot.position),
+                    bullet, starts.get(bullet, bullet.position)
+                ):
+                    self.debris(bullet, 12)
+                    shot.explode()
+                    bullet.explode()
+                    break
+
+    def phase(self):
+        """Return the part of the game being played."""
+        if self.loading:
+            return "loading"
+        if self._lives <= 0:
+            return "game over"
+        # the dead are taken out of the rows a march step after dying
+        if sum(len(alien_row) for alien_row in self.aliens) \
+                <= ENDGAME_ALIENS:
+            return "endgame"
+        return "march"
+
+    def handle_input(self, controls):
+        """Handle the controls of a frame."""
+        super().handle_input(controls)
+        self.controls = controls
+        self._rewinding = "rewind" in controls.held
 
         if self.loading is True:
             return
 
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_RETURN:
-                self._secret = not self._secret
+        if "toggle" in controls.pressed:
+            self._secret = not self._secret
 
-        self.player.move(event)
-        self.player.shoot(event)
+        self.player.steer(controls)
 
     # Linter, please shut up. Sincerely, lulzsun
     # pylint: disable-next=R
     def update_scene(self):
         """Update the scene state."""
+        if self.host is not None:
+            # the joined player steers the same cannon
+            remote = self._remote_input.update(self.host.poll())
+            if self.loading is False:
+                self.player.steer(combine(self.controls, remote))
+            if self.host.due():
+                self.host.send(savestate.save(self))
+        if self.history is not None:
+            if self._rewinding and self.history:
+                # step back a frame instead of forward
+                savestate.load(self, self.history.rewind())
+                self._screen.fill("black")
+                return
+            self.history.push(savestate.save(self))
         super().update_scene()
+        if self.particles is not None:
+            self.particles.update()
 
-        # animating the loading effect
+        # animating the loading effect, the whole wave is spawned on
+        # the first frame and shown a piece a frame
         if self.loading is True:
             if self._anim_state == 0:
-                if len(self.shields) == 4:
-                    self.shields.clear()
-                self.shields.append(
-                    Shield((31+((24+22)*len(self.shields)), 192))
-                )
-                if len(self.shields) == 4:
-                    self._anim_state += 1
-            elif self._anim_state == 1:
-                self.aliens[4].append(
-                    Octopus(
-                        (len(self.aliens[4])*16 + 24, 128),
-                        (len(self.aliens[4]), 4)
-                    )
-                )
-                if len(self.aliens[4]) == 11:
-                    self._anim_state += 1
-            elif self._anim_state == 2:
-                self.aliens[3].append(
-                    Octopus(
-                        (len(self.aliens[3])*16 + 24, 112),
-                        (len(self.aliens[3]), 3)
-                    )
-                )
-                if len(self.aliens[3]) == 11:
-                    self._anim_state += 1
-            elif self._anim_state == 3:
-                self.aliens[2].append(
-                    Crab(
-                        (len(self.aliens[2])*16 + 24, 96),
-                        (len(self.aliens[2]), 2)
-                    )
-                )
-                if len(self.aliens[2]) == 11:
-                    self._anim_state += 1
-            elif self._anim_state == 4:
-                self.aliens[1].append(
-                    Crab(
-                        (len(self.aliens[1])*16 + 24, 80),
-                        (len(self.aliens[1]), 1)
-                    )
-                )
-                if len(self.aliens[1]) == 11:
-                    self._anim_state += 1
-            elif self._anim_state == 5:
-                self.aliens[0].append(
-                    Squid(
-                        (len(self.aliens[0])*16 + 24, 64),
-                        (len(self.aliens[0]), 0)
-                    )
-                )
-                if len(self.aliens[0]) == 11:
-                    self._anim_state += 1
-            elif self._anim_state == 6:
+                self.aliens, self.shields = self.wave.spawn(self._level)
+            self._anim_state += 1
+            if (self._anim_state == self.wave.loading_frames
+                    or not self.animate_waves):
                 self._anim_state = 0
                 self.loading = False
-                los = [alien.grid_position for alien in self.aliens[4]]
-                self.alien_line_of_sight = los
+                self.alien_line_of_sight = list(self.wave.line_of_sight)
             return
 
         # check if player was hit and play animation
@@ -512,6 +638,9 @@ class InvadersGameScene(Scene):
                 done = self.player.explode()
                 if done:
                     self._lives -= 1
+                    self.record_event(
+                        DEATH, max(self._lives, 0), self.p1_score
+                    )
                     self.player.explode_frame = 0
                     self._frames = 0
                     if self._lives <= 0:
@@ -542,6 +671,7 @@ class InvadersGameScene(Scene):
                 self.alien_move = 2
                 self.alien_position_x = 0
                 self.alien_position_y = 0
+                self.record_event(WAVE, self._level, self.p1_score)
                 self._level += 1
                 self.loading = True
             return
@@ -552,8 +682,12 @@ class InvadersGameScene(Scene):
             if changed is True:
                 self._frames = 0
 
+        # where every bullet was, collisions are checked all along the
+        # way it moves from there
+        starts = {bullet: bullet.position for bullet in self.bullets}
         for bullet in self.bullets:
             # move bullets
+            self.enter_phase("movement")
             position = bullet.position
             if bullet.explode_frame == 0:
                 if bullet.is_player_owned:
@@ -569,40 +703,67 @@ class InvadersGameScene(Scene):
             if position[1] < 34:
                 if bullet.explode_frame == 0:
                     bullet.move((0, 4))
+                    self.debris(bullet, 12)
                 bullet.explode(True)
 
             if position[1] > 231:
                 bullet.explode()
 
             # bullet collision check
+            self.enter_phase("collision")
             for alien_row in self.aliens:
                 for alien in alien_row:
-                    if bullet.is_player_owned and alien.is_colliding(bullet):
+                    if bullet.is_player_owned and alien.is_colliding(
+                        bullet, starts[bullet]
+                    ):
                         ExplodeSFX().play()
                         alien.explode()
+                        self.debris(alien, 60, speed=1.5, life=40)
                         self.bullets.remove(bullet)
                         self.p1_score += alien.points
+                        self.record_event(
+                            KILL, SPECIES.index(type(alien).__name__),
+                            alien.points
+                        )
                         self._next_life += alien.points
                         if self._next_life >= 1500:
                             PowerUpSFX().play()
                             self._lives += 1
                             self._next_life -= 1500
+                            self.record_event(
+                                EXTRA_LIFE, self._lives, self.p1_score
+                            )
                         return
 
             for shield in self.shields:
-                if shield.is_colliding(bullet):
+                hit = shield.is_colliding(bullet, starts[bullet])
+                if hit:
+                    # back to where it hit, in case it went right through
+                    bullet.place(hit)
+                    if bullet.explode_frame == 0:
+                        self.debris(bullet, 12)
                     bullet.explode()
+                    self.enter_phase("shields")
                     shield.damage(bullet)
+                    self.enter_phase("collision")
                     continue
 
-            if self.player.is_colliding(bullet):
+            # the player's own bullet leaves from inside the cannon
+            if not bullet.is_player_owned and self.player.is_colliding(
+                bullet, starts[bullet]
+            ):
                 DeathSFX().play()
                 self.bullets.clear()
                 self.player.explode()
+                self.debris(self.player, 150, speed=2.0, life=60)
                 return
 
+        self.enter_phase("collision")
+        self.collide_bullets(starts)
+
         for alien_row in self.aliens:
             for alien in alien_row:
+                self.enter_phase("other")
                 # check if alien passed y-axis limit (gameover)
                 if alien.position[1] >= 216:
                     DeathSFX().play()
@@ -611,15 +772,22 @@ class InvadersGameScene(Scene):
                     return
 
                 # check if alien collided into a shield
+                self.enter_phase("collision")
                 for shield in self.shields:
                     if shield.is_colliding(alien):
+                        self.enter_phase("shields")
                         shield.damage(alien)
+                        self.enter_phase("collision")
+                self.enter_phase("other")
 
-                # make sure aliens only have 1 bullet on screen
-                if not any(
+                # make sure aliens only have as many bullets on screen as
+                # the wave allows
+                if sum(
                     bullet.is_player_owned is False for bullet in self.bullets
-                ):
-                    shooter_pos = random.choice(self.alien_line_of_sight)
+                ) < self.wave.shots_at(self._level):
+                    shooter_pos = self.rng.choice(
+                        self.alien_line_of_sight
+                    )
                     if alien.grid_position == shooter_pos and alien.is_alive:
                         self.bullets.append(
                             Bullet((alien.position[0]+6, alien.position[1]+8))
@@ -635,9 +803,11 @@ class InvadersGameScene(Scene):
                     return
 
         # make sure player only has 1 bullet on screen
+        self.enter_phase("other")
         if not any(bullet.is_player_owned for bullet in self.bullets):
             if self.player.shooting:
                 ShootSFX().play()
+                self.record_event(SHOT, 0, self.p1_score)
                 self.bullets.append(
                     Bullet(
                         (self.player.position_x+7, 211),
@@ -648,6 +818,7 @@ class InvadersGameScene(Scene):
         # alien movement, overly complicated, but in a nutshell,
         # this allows one alien to move per frame. the less aliens
         # on the screen, the faster the aliens move. this is awesome
+        self.enter_phase("movement")
         index = 1
         new_los = None
         for alien_row in self.aliens:
@@ -713,23 +884,103 @@ class InvadersGameScene(Scene):
         Font().draw(self._screen, (96-16-8, 64-8), text=self.game_over_txt)
 
         # draw screen border
-        bottom = pygame.Surface((self._screen.get_width(), 1))
-        bottom.fill((255, 255, 255))
-        self._screen.blit(bottom, (0, 239))
+        self._screen.fill(
+            (255, 255, 255), (0, 239, self._screen.get_width(), 1)
+        )
 
         # render player
         self.player.draw(self._screen, (self.player.position_x, 216))
 
-        # render shields
-        for shield in self.shields:
+        # render shields and aliens, while loading only those shown yet
+        shields = len(self.shields)
+        rows = [len(alien_row) for alien_row in self.aliens]
+        if self.loading:
+            shields, rows = self.wave.shown(self._anim_state)
+        for shield in self.shields[:shields]:
             shield.draw(self._screen, (0, 0), relative=True)
 
-        # render aliens
-        for alien_row in self.aliens:
-            for alien in alien_row:
+        for alien_row, shown in zip(self.aliens, rows):
+            for alien in alien_row[:shown]:
                 alien.draw(self._screen, (0, 0), relative=True)
 
         # render bullets
         for bullet in self.bullets:
             bullet.draw(self._screen, relative=True)
+
+        if self.particles is not None:
+            self.particles.draw(self._screen)
         super().draw()
+
+
+class AttractScene(InvadersGameScene):
+    """The game playing itself while nobody is around"""
+
+    def __init__(self, screen, soundtrack=None):
+        """Initialize the scene."""
+        super().__init__(screen, soundtrack)
+        self.history = None
+        self._autopilot = Autopilot(self)
+        self._autopilot_input = InputState(keyboard=False)
+        self._demo_frames = 0
+
+    def handle_input(self, controls):
+        """Any key ends the demo."""
+        Scene.handle_input(self, controls)
+        if controls.any_key:
+            self.next_scene()
+
+    def update_scene(self):
+        """Update the scene state, with the keys of the autopilot.
+        The demo is silent and ends when the cannon is hit."""
+        super().handle_input(
+            self._autopilot_input.update(self._autopilot.events())
+        )
+        lives = self._lives
+        Sound.muted = True
+        super().update_scene()
+        Sound.muted = False
+        self._demo_frames += 1
+        if self._lives < lives or self._demo_frames >= ATTRACT_LENGTH:
+            self.next_scene()
+
+
+class RemoteScene(InvadersGameScene):
+    """A game hosted on another machine, watched or played on the
+    host's cannon"""
+
+    def __init__(self, screen, soundtrack=None):
+        """Initialize the scene."""
+        super().__init__(screen, soundtrack)
+        self.history = None
+        # the connection to the host, set once constructed
+        self.link = None
+
+    def handle_input(self, controls):
+        """Handle the controls of a frame, a spectator only gets to
+        quit."""
+        if self.link.role != netplay.PLAYER:
+            Scene.handle_input(self, controls)
+            return
+        # the host is sent the keys of the actions it takes from the
+        # joined player
+        for action in netplay.PLAYER_ACTIONS:
+            key = DEFAULT_BINDINGS[action][0]
+            if action in controls.pressed:
+                self.link.send_key(pygame.event.Event(pygame.KEYDOWN, key=key))
+            if action in controls.released and action not in controls.held:
+                self.link.send_key(pygame.event.Event(pygame.KEYUP, key=key))
+        # and carry on as if the key was pressed at the host, until
+        # the host says what actually happened
+        super().handle_input(controls)
+
+    def update_scene(self):
+        """Update the scene state from the host, predicting the frames
+        that have not arrived."""
+        state = self.link.poll()
+        if state is not None:
+            savestate.load(self, state)
+        if self.link.closed:
+            print("The host is gone.")
+            self.next_scene()
+            self.is_exiting = True
+        super().update_scene()
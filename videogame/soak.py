@@ -0,0 +1,433 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Soak test, the whole game played headless for hours at a time.
+
+    python -m videogame.soak --minutes 240 [-- game options]
+
+The game runs in a child process, so that a crash, segfaults included,
+ends the test instead of the harness. The child plays as fast as it can
+with a bot, or replays the inputs of an earlier run, and reports memory,
+live pygame objects and frame times every interval. The test fails on a
+crash or when memory keeps growing once the caches have filled up.
+The seed and every input are kept in the output directory, so a failed
+run can be played again exactly.
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from videogame import game
+from videogame.autopilot import Autopilot
+from videogame.sprites import Sprite
+
+# samples taken while the caches fill up, not counted as growth
+WARMUP_SAMPLES = 3
+# growth that fails the test, once there are enough samples to tell
+MAX_RSS_GROWTH = 8.0  # MB
+MAX_OBJECT_GROWTH = 500
+MIN_SAMPLES = 6
+# allocators listed in each sample
+TOP_ALLOCATORS = 5
+
+
+def parse_args(argv=None):
+    """Parse the command line options of the soak test."""
+    parser = argparse.ArgumentParser(
+        prog="python -m videogame.soak",
+        description="Play the game headless for a long time and watch "
+                    "its memory"
+    )
+    parser.add_argument(
+        "--minutes", type=float, default=60.0,
+        help="how long to play for"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=60.0, metavar="SECONDS",
+        help="time between samples"
+    )
+    parser.add_argument(
+        "--seed", type=int,
+        help="seed of the game and the bot, random when left out"
+    )
+    parser.add_argument(
+        "--replay", metavar="LOG",
+        help="play the inputs of an earlier run instead of the bot"
+    )
+    parser.add_argument(
+        "--out", metavar="DIR",
+        help="where the samples and inputs go, soak-SEED by default"
+    )
+    parser.add_argument(
+        "--no-tracemalloc", action="store_true",
+        help="leave tracemalloc off, it slows the game down"
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "game_args", nargs=argparse.REMAINDER,
+        help="options for the game, after --"
+    )
+    options = parser.parse_args(argv)
+    if options.game_args[:1] == ["--"]:
+        options.game_args = options.game_args[1:]
+    if options.replay:
+        with open(options.replay, encoding="utf-8") as log:
+            options.seed = int(log.readline().split()[1])
+    if options.seed is None:
+        options.seed = random.randrange(2 ** 32)
+    if not options.out:
+        options.out = f"soak-{options.seed}"
+        if options.replay:
+            options.out += "-replay"
+    options.out = os.path.abspath(options.out)
+    return options
+
+
+def main(argv=None):
+    """Run the soak test, or the game under test in the child"""
+    options = parse_args(argv)
+    if options.child:
+        return _child(options)
+    return _supervise(options)
+
+
+def _supervise(options):
+    """Run the child, collect its samples and judge them"""
+    os.makedirs(options.out, exist_ok=True)
+    print(f"Soak test, seed {options.seed}, writing to {options.out}")
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    # the child runs in the output directory, where its leaderboard goes,
+    # and still has to find this package
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, (root, env.get("PYTHONPATH")))
+    )
+    command = [
+        sys.executable, "-m", "videogame.soak", "--child",
+        "--minutes", str(options.minutes),
+        "--interval", str(options.interval),
+        "--seed", str(options.seed), "--out", options.out,
+    ]
+    if options.replay:
+        command += ["--replay", os.path.abspath(options.replay)]
+    if options.no_tracemalloc:
+        command.append("--no-tracemalloc")
+    command += ["--"] + options.game_args
+
+    samples = []
+    with open(os.path.join(options.out, "samples.jsonl"), "w",
+              encoding="utf-8") as samples_file, subprocess.Popen(
+                  command, stdout=subprocess.PIPE, text=True, env=env,
+                  cwd=options.out) as child:
+        for line in child.stdout:
+            if not line.startswith("{"):
+                # whatever else the game prints
+                continue
+            sample = json.loads(line)
+            samples.append(sample)
+            samples_file.write(line)
+            samples_file.flush()
+            print(_format(sample))
+    failures = judge(samples, child.returncode)
+
+    print()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"PASS: {len(samples)} samples, no crash, no growth")
+    print(f"seed {options.seed}, inputs in "
+          f"{os.path.join(options.out, 'inputs.log')}")
+    return 1 if failures else 0
+
+
+def judge(samples, returncode):
+    """Return what went wrong in a run, nothing if it passed"""
+    failures = []
+    if returncode:
+        if returncode < 0:
+            failures.append(f"crashed with signal {-returncode}")
+        else:
+            failures.append(f"exited with status {returncode}")
+    steady = samples[WARMUP_SAMPLES:]
+    if len(steady) < MIN_SAMPLES:
+        return failures
+    growth = _sustained_growth(steady, lambda sample: sample["rss_mb"])
+    if growth > MAX_RSS_GROWTH:
+        failures.append(f"memory kept growing, by {growth:.1f} MB")
+    for name in steady[0]["objects"]:
+        growth = _sustained_growth(
+            steady, lambda sample, name=name: sample["objects"][name]
+        )
+        if growth > MAX_OBJECT_GROWTH:
+            failures.append(f"{name} count kept growing, by {growth:.0f}")
+    return failures
+
+
+def _sustained_growth(samples, value):
+    """Return how much the lowest value rose from the first third of
+    the samples to the last, or 0 unless it rose in every third.
+    Lows are compared because highs depend on what was on screen."""
+    third = len(samples) // 3
+    lows = [
+        min(value(sample) for sample in part) for part in (
+            samples[:third], samples[third:-third], samples[-third:]
+        )
+    ]
+    if not lows[0] < lows[1] < lows[2]:
+        return 0
+    return lows[2] - lows[0]
+
+
+def _format(sample):
+    """One line of progress for a sample"""
+    frame_ms = sample["frame_ms"]
+    objects = ", ".join(
+        f"{name} {count}" for name, count in sample["objects"].items()
+    )
+    return (
+        f"{sample['elapsed'] / 60:7.1f} min  frame {sample['frame']:>9}  "
+        f"rss {sample['rss_mb']:7.1f} MB  "
+        f"p50/p99 {frame_ms['p50']:.2f}/{frame_ms['p99']:.2f} ms  {objects}"
+    )
+
+
+def _child(options):
+    """Play the game, printing a sample every interval"""
+    if not options.no_tracemalloc:
+        tracemalloc.start()
+    return SoakGame(options).run()
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class Stopwatch:
+    """Stands in for the clock of the game and keeps how long each
+    frame took. It never waits, unless the clock of the game is one the
+    options asked for, which it waits with."""
+
+    def __init__(self, clock=None):
+        self.frame_times = []
+        self._clock = None
+        # pygame's own clock only sleeps, the others are what is tested
+        if not isinstance(clock, (type(None), pygame.time.Clock)):
+            self._clock = clock
+        self._last = time.perf_counter()
+
+    def tick(self, framerate=0):
+        """Mark the end of a frame, return its milliseconds"""
+        if self._clock is not None:
+            self._clock.tick(framerate)
+        now = time.perf_counter()
+        took = now - self._last
+        self.frame_times.append(took)
+        self._last = now
+        return int(took * 1000)
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class Bot:
+    """Presses keys through every scene, and plays the game itself with
+    the autopilot of the demo"""
+
+    def __init__(self, seed):
+        self._rng = random.Random(seed)
+        self._scene = None
+        self._autopilot = None
+        self._wait = 0
+
+    def events(self, scene):
+        """Return the key events of the next frame of scene"""
+        if scene is not self._scene:
+            self._scene = scene
+            self._autopilot = None
+            if type(scene).__name__ == "InvadersGameScene":
+                self._autopilot = Autopilot(scene)
+                # then it gives up, or the game might never end
+                self._wait = self._rng.randrange(60 * 30, 60 * 180)
+            else:
+                # now and then long enough for the title to play the demo
+                self._wait = self._rng.choice((30, 120, 60 * 20))
+        if self._autopilot is not None:
+            self._wait -= 1
+            if self._wait > 0:
+                return self._autopilot.events()
+            autopilot, self._autopilot = self._autopilot, None
+            self._wait = float("inf")
+            return autopilot.release()
+        self._wait -= 1
+        if self._wait > 0:
+            return []
+        self._wait = self._rng.randrange(10, 60)
+        return [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)]
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-few-public-methods
+class Replay:
+    """Hands out the inputs of an inputs.log frame by frame"""
+
+    def __init__(self, path):
+        self._inputs = {}
+        # the frame the run ended on, or the last input of a crashed run
+        self.last_frame = 0
+        with open(path, encoding="utf-8") as log:
+            log.readline()
+            for line in log:
+                fields = line.split()
+                if fields[0] == "end":
+                    self.last_frame = int(fields[1])
+                    continue
+                frame, event_type, key = (int(field) for field in fields)
+                self._inputs.setdefault(frame, []).append(
+                    pygame.event.Event(event_type, key=key)
+                )
+                self.last_frame = max(self.last_frame, frame)
+
+    def events(self, frame):
+        """Return the key events of frame"""
+        return self._inputs.get(frame, [])
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class SoakGame(game.SpaceInvadersGame):
+    """The game with its events coming from a bot or a replay"""
+
+    def __init__(self, options):
+        random.seed(options.seed)
+        super().__init__(game.parse_args(options.game_args))
+        self._clock = Stopwatch(self._clock)
+        self._soak = options
+        self._frame = 0
+        self._start = time.perf_counter()
+        self._next_sample = self._start + options.interval
+        self._bot = Bot(options.seed)
+        self._replay = Replay(options.replay) if options.replay else None
+        # pylint: disable-next=consider-using-with
+        self._log = open(
+            os.path.join(options.out, "inputs.log"), "w",
+            encoding="utf-8", buffering=1
+        )
+        self._log.write(f"seed {options.seed}\n")
+        self._baseline = None
+        self._quitting = False
+
+    def _events(self, scene):
+        """Return the events of the next frame, and take a sample when
+        one is due"""
+        self._frame += 1
+        events = pygame.event.get()
+        if self._replay is not None:
+            inputs = self._replay.events(self._frame)
+        else:
+            inputs = self._bot.events(scene)
+        for event in inputs:
+            self._log.write(f"{self._frame} {event.type} {event.key}\n")
+        events.extend(inputs)
+
+        now = time.perf_counter()
+        if now >= self._next_sample:
+            self._next_sample = now + self._soak.interval
+            print(json.dumps(self.sample(now)), flush=True)
+        if self._replay is not None:
+            over = self._frame >= self._replay.last_frame
+        else:
+            over = now - self._start >= self._soak.minutes * 60
+        if over:
+            if not self._quitting:
+                self._log.write(f"end {self._frame}\n")
+                self._quitting = True
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+    # I know what I'm doing, linter.
+    # pylint: disable-next=unused-argument
+    def _rest(self, scene):
+        """Never rest, the bot plays as fast as the game goes"""
+
+    def sample(self, now):
+        """Return the measurements of the last interval"""
+        times = sorted(self._clock.frame_times) or [0.0]
+        self._clock.frame_times.clear()
+        quantiles = statistics.quantiles(times, n=100) \
+            if len(times) > 1 else times * 99
+        return {
+            "frame": self._frame,
+            "elapsed": now - self._start,
+            "rss_mb": resident_memory() / 2 ** 20,
+            "frame_ms": {
+                "p50": quantiles[49] * 1000,
+                "p95": quantiles[94] * 1000,
+                "p99": quantiles[98] * 1000,
+                "max": times[-1] * 1000,
+            },
+            "objects": live_objects(),
+            "top": self._top_allocators(),
+        }
+
+    def _shut_down(self):
+        self._log.close()
+        super()._shut_down()
+
+    def _top_allocators(self):
+        """Return where the most memory was allocated, or once the
+        caches have filled up, where it grew the most since"""
+        if not tracemalloc.is_tracing():
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        self._baseline = self._baseline or snapshot
+        if snapshot is self._baseline:
+            stats = snapshot.statistics("lineno")
+        else:
+            stats = snapshot.compare_to(self._baseline, "lineno")
+        return [str(stat) for stat in stats[:TOP_ALLOCATORS]]
+
+
+def resident_memory():
+    """Return the bytes of memory the process holds right now"""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # no procfs, the peak is the best there is
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def live_objects():
+    """Count the pygame objects and sprites alive.
+    Surfaces and rects are not tracked by the garbage collector, so
+    they are found through the objects that hold them."""
+    tracked = gc.get_objects()
+    held = {}
+    for obj in tracked:
+        for referent in gc.get_referents(obj):
+            if isinstance(referent, (pygame.Surface, pygame.Rect)):
+                held[id(referent)] = referent
+    counts = {
+        "objects": len(tracked),
+        "Surface": sum(
+            isinstance(obj, pygame.Surface) for obj in held.values()
+        ),
+        "Rect": sum(isinstance(obj, pygame.Rect) for obj in held.values()),
+        "Sprite": sum(isinstance(obj, Sprite) for obj in tracked),
+    }
+    return counts
+
+
+if __name__ == "__main__":
+    sys.exit(main())
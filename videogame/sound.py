@@ -3,38 +3,171 @@
 # @lulzsun
 """Module of objects for playing sound."""
 
+import functools
+import itertools
 import os
 import pygame
+from videogame import synth
+from videogame.assets import load_sound
+
+# channels reserved for the sound effects
+POOL_SIZE = 6
+# sounds up to this many seconds may wait for a channel
+SHORT_SOUND = 0.35
+
+# voice priorities, a voice can take the channel of a lower one
+PRIORITY_SHOT = 1
+PRIORITY_EXPLOSION = 2
+PRIORITY_EXTRA_LIFE = 3
+PRIORITY_DEATH = 4
+PRIORITY_MARCH = 5
+
+
+class ChannelManager:
+    """Shares a fixed pool of mixer channels between all sounds.
+
+    When every channel is busy, a sound takes the channel of the voice
+    with the lowest priority not above its own, the oldest one first.
+    A short sound that cannot take a channel waits in the queue of one
+    instead, anything else is dropped.
+    """
+
+    def __init__(self, size=POOL_SIZE):
+        if pygame.mixer.get_num_channels() < size:
+            pygame.mixer.set_num_channels(size)
+        # keeps the pool away from Sound.play() and find_channel()
+        pygame.mixer.set_reserved(size)
+        self._channels = [pygame.mixer.Channel(i) for i in range(size)]
+        # (priority, order, group) of what each channel plays
+        self._voices = [None] * size
+        self._order = itertools.count()
+        self.stolen = 0
+        self.queued = 0
+        self.dropped = 0
+
+    def play(self, sound, priority, group=None):
+        """Play sound, return its channel or None if it was dropped.
+        A sound with a group replaces whatever its group plays."""
+        if group is not None:
+            self.stop(group)
+        index = self._free()
+        if index is None:
+            index = self._victim(priority)
+            if index is None:
+                return self._queue(sound)
+            self._channels[index].stop()
+            self.stolen += 1
+        self._channels[index].play(sound)
+        self._voices[index] = (priority, next(self._order), group)
+        return self._channels[index]
+
+    def stop(self, group):
+        """Stop every voice of a group"""
+        for index, voice in enumerate(self._voices):
+            if voice is not None and voice[2] == group:
+                self._channels[index].stop()
+                self._voices[index] = None
+
+    def _free(self):
+        """Return the index of an idle channel, None if all are busy"""
+        for index, channel in enumerate(self._channels):
+            if not channel.get_busy():
+                return index
+        return None
+
+    def _victim(self, priority):
+        """Return the index of the channel to steal, None if every
+        voice is more important than priority"""
+        candidates = [
+            (voice, index) for index, voice in enumerate(self._voices)
+            if voice is not None and voice[0] <= priority
+        ]
+        if not candidates:
+            return None
+        return min(candidates)[1]
+
+    def _queue(self, sound):
+        """Queue a short sound behind the least important voice"""
+        if sound.get_length() <= SHORT_SOUND:
+            waiting = [
+                (voice, index) for index, voice in enumerate(self._voices)
+                if voice is not None
+                and self._channels[index].get_queue() is None
+            ]
+            if waiting:
+                channel = self._channels[min(waiting)[1]]
+                channel.queue(sound)
+                self.queued += 1
+                return channel
+        self.dropped += 1
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def channel_manager():
+    """Return the channel manager shared by all sounds.
+    Only call it once the mixer runs."""
+    return ChannelManager()
 
 
 class Sound:
     """Base class for making sound."""
-    def __init__(self, channel=0, filename=""):
+    # generated tones are played instead of files, once use_synth()
+    # was called
+    synthesized = False
+    # a new sound of an exclusive class replaces the one playing
+    exclusive = False
+    # nothing plays while set
+    muted = False
+
+    def __init__(self, priority=0, filename="", voice=None):
         self._filename = filename
-        self._channel = channel
+        self._priority = priority
+        # name and parameters of the generated tone replacing the file
+        self._voice = voice
+
+    @classmethod
+    def use_synth(cls):
+        """Play generated tones instead of sound files from now on."""
+        cls.synthesized = True
 
     def filepath(self):
         """Return full file path of sound file"""
         return os.path.join(os.path.dirname(__file__), 'data', self._filename)
 
+    def sound(self):
+        """Return the mixer sound to play"""
+        if self.synthesized and self._voice:
+            return synth.sound(*self._voice)
+        return load_sound(self._filename)
+
     def play(self):
-        """Play sound file, stop sound if one is already playing"""
-        pygame.mixer.Channel(self._channel).stop()
-        pygame.mixer.Channel(self._channel).play(
-            pygame.mixer.Sound(self.filepath())
+        """Play sound on a channel of the shared pool"""
+        if self.muted or not pygame.mixer.get_init():
+            # the mixer may still be starting in the background
+            return
+        group = type(self).__name__ if self.exclusive else None
+        channel_manager().play(
+            self.sound(), self._priority, group
         )
 
 
 class BGM(Sound):
     """Background music, aka the pulsing sound effect"""
+    exclusive = True
+
     def __init__(self):
-        super().__init__(0)
+        super().__init__(PRIORITY_MARCH)
         self._tone = 0
         self.timing = 60
 
     def play(self, new_timing=60):
-        """Plays 4 tones of the BGM, return True if timing changed"""
+        """Plays 4 tones of the BGM, return True if timing changed.
+        The timing only changes after all 4 of them, so the march goes
+        as fast whatever plays it. Generated tones take the pitch of the
+        new timing on every tone."""
         self._filename = f"sfx_menu_move{self._tone+1}.wav"
+        self._voice = ('march', self._tone, new_timing)
         super().play()
         self._tone += 1
         if self._tone == 4:
@@ -47,22 +180,27 @@ class BGM(Sound):
 class ShootSFX(Sound):
     """Player shooting sound effect"""
     def __init__(self):
-        super().__init__(1, "sfx_wpn_laser9.wav")
+        super().__init__(PRIORITY_SHOT, "sfx_wpn_laser9.wav", ('shot',))
 
 
 class ExplodeSFX(Sound):
     """Alien exploding/death sound effect"""
     def __init__(self):
-        super().__init__(1, "sfx_sounds_interaction25.wav")
+        super().__init__(
+            PRIORITY_EXPLOSION, "sfx_sounds_interaction25.wav",
+            ('explosion',)
+        )
 
 
 class DeathSFX(Sound):
     """Player exploding/death sound effect"""
     def __init__(self):
-        super().__init__(1, "sfx_exp_medium4.wav")
+        super().__init__(PRIORITY_DEATH, "sfx_exp_medium4.wav", ('death',))
 
 
 class PowerUpSFX(Sound):
     """Player life gain sound effect"""
     def __init__(self):
-        super().__init__(2, "sfx_sounds_pause6_in.wav")
+        super().__init__(
+            PRIORITY_EXTRA_LIFE, "sfx_sounds_pause6_in.wav", ('extra_life',)
+        )
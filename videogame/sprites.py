@@ -3,8 +3,9 @@
 # @lulzsun
 """Sprite objects for creating text and game entities."""
 
-import os
 import pygame
+from videogame.assets import load_image
+from videogame.collision import contact, frame_mask
 
 
 class Sprite:
@@ -12,58 +13,37 @@ class Sprite:
 
     def __init__(self, filename, position=(0, 0)):
         self.position = position
-        self.sheet = pygame.image.load(
-            os.path.join(os.path.dirname(__file__), 'data', filename)
-        ).convert()
+        self.sheet = load_image(filename)
         self.rect = pygame.Rect((0, 0, 16, 8))
-        self.surf = pygame.Surface(self.rect.size)
 
     def draw(self, surf: pygame.Surface, position=(0, 0), relative=False):
         """Draw the sprite on a surface at position"""
-        pygame.Surface.set_colorkey(self.surf, [0, 0, 0], pygame.RLEACCEL)
-        if not isinstance(self, Font):
-            self.surf.blit(self.sheet, (0, 0), self.rect)
+        self.place(position, relative)
+        surf.blit(self.sheet, self.position, self.rect)
+
+    def place(self, position=(0, 0), relative=False):
+        """Set the position, or move by position if relative is True"""
         if relative is False:
             self.position = position
-            surf.blit(self.surf, self.position)
         else:
             self.position = (
                 self.position[0]+position[0],
                 self.position[1]+position[1]
             )
-            surf.blit(self.surf, self.position)
-
-    def is_colliding(self, sprite):
-        """Check collision between another sprite."""
-        # this is definitely not the right way to do it...
-        # my "sprite" classes are not actually sprite objects, so instead
-        # i am just temporarily creating the sprites to use collide_mask()
-        # i am too stubborn to do things the right way, i may regret this later
+
+    def is_colliding(self, sprite, start=None):
+        """Check collision between another sprite. With start, sprite is
+        checked all along the way it moved from start this frame.
+        Return where sprite touched, or None."""
         if isinstance(self, Alien):
             if self.is_alive is False:
-                return False
+                return None
 
         if isinstance(sprite, Alien):
             if sprite.is_alive is False:
-                return False
-
-        real_sprite1 = pygame.sprite.Sprite()
-        real_sprite1.image = self.surf
-        real_sprite1.rect = pygame.Rect((
-            self.position[0], self.position[1],
-            self.rect.width, self.rect.height
-        ))
-        real_sprite1.mask = pygame.mask.from_surface(self.surf)
+                return None
 
-        real_sprite2 = pygame.sprite.Sprite()
-        real_sprite2.image = sprite.surf
-        real_sprite2.rect = pygame.Rect((
-            sprite.position[0], sprite.position[1],
-            sprite.rect.width, sprite.rect.height
-        ))
-        real_sprite2.mask = pygame.mask.from_surface(sprite.surf)
-
-        return pygame.sprite.collide_mask(real_sprite1, real_sprite2)
+        return contact(sprite, start or sprite.position, self)
 
 
 class Player(Sprite):
@@ -77,39 +57,26 @@ class Player(Sprite):
         self.shooting = False
         self.explode_frame = 0
 
-    def move(self, event):
-        """Keyboard controls for moving"""
+    def steer(self, controls):
+        """Move and shoot with the actions of the frame. The direction
+        pressed last wins while both are held."""
         if self.explode_frame != 0:
             self.velocity = 0
-            return
-
-        if event.type == pygame.KEYDOWN:
-            if event.key in {pygame.K_a, pygame.K_LEFT}:
-                if self.velocity != -1:
-                    self.velocity = -1
-            if event.key in {pygame.K_d, pygame.K_RIGHT}:
-                if self.velocity != 1:
-                    self.velocity = 1
-        elif event.type == pygame.KEYUP:
-            if event.key in {pygame.K_a, pygame.K_LEFT}:
-                if self.velocity == -1:
-                    self.velocity = 0
-            if event.key in {pygame.K_d, pygame.K_RIGHT}:
-                if self.velocity == 1:
-                    self.velocity = 0
-
-    def shoot(self, event):
-        """Keyboard controls for shooting"""
-        if self.explode_frame != 0:
             self.shooting = False
             return
 
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE:
-                self.shooting = True
-        elif event.type == pygame.KEYUP:
-            if event.key == pygame.K_SPACE:
-                self.shooting = False
+        if "left" in controls.pressed:
+            self.velocity = -1
+        if "right" in controls.pressed:
+            self.velocity = 1
+        heading = {-1: "left", 1: "right"}.get(self.velocity)
+        if heading not in controls.held:
+            self.velocity = (
+                ("right" in controls.held) - ("left" in controls.held)
+            )
+        self.shooting = (
+            "fire" in controls.held or "fire" in controls.pressed
+        )
 
     def explode(self):
         """Play explosion animation. Return True when done"""
@@ -122,7 +89,6 @@ class Player(Sprite):
                 self.rect = pygame.Rect((32, 0, 16, 8))
         else:
             self.rect = pygame.Rect((0, 0, 0, 0))
-            self.surf = pygame.Surface(self.rect.size)
 
         self.explode_frame += 1
         return self.explode_frame == 30
@@ -130,7 +96,6 @@ class Player(Sprite):
     def respawn(self):
         """Player reset to alive frame and position"""
         self.rect = pygame.Rect((0, 0, 16, 8))
-        self.surf = pygame.Surface(self.rect.size)
         self.position_x = 24
 
     def draw(self, surf: pygame.Surface, position=(0, 0), relative=False):
@@ -156,7 +121,6 @@ class Alien(Sprite):
         """Alternative between 2 alien frames"""
         if self.is_alive and self.explode_frame == 0:
             self.rect = pygame.Rect((16*self._idle_frame, 0, 16, 8))
-            self.surf = pygame.Surface(self.rect.size)
             if self._idle_frame == 0:
                 self._idle_frame = 1
             else:
@@ -168,7 +132,6 @@ class Alien(Sprite):
         if self.explode_frame == 0:
             self.rect = pygame.Rect((32, 0, 16, 8))
             # self.position = (self.position[0]-2, self.position[1])
-            self.surf = pygame.Surface(self.rect.size)
 
         self.explode_frame += 1
         return self.explode_frame == 15
@@ -213,7 +176,6 @@ class Cuttlefish(Alien):
         """Initialize the Cuttlefish (UFO) alien."""
         super().__init__('alien4.png', position, (-1, -1))
         self.rect = pygame.Rect((0, 0, 24, 8))
-        self.surf = pygame.Surface(self.rect.size)
         self.points = points
 
 
@@ -224,23 +186,18 @@ class Shield(Sprite):
         """Initialize the Shield."""
         super().__init__('shield.png', position)
         self.rect = pygame.Rect((0, 0, 24, 16))
-        self.surf = pygame.Surface(self.rect.size)
 
     def damage(self, sprite):
-        """Create damage to shield."""
-        mask = pygame.Surface.copy(sprite.sheet)
-        pygame.Surface.set_colorkey(mask, [0, 0, 0], pygame.RLEACCEL)
-        color_image = pygame.Surface(mask.get_size()).convert_alpha()
-        color_image.fill([255, 0, 0])
-        mask.blit(color_image, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-        self.surf.blit(mask, (
+        """Create damage to shield, clearing every pixel sprite covers."""
+        # a new sheet rather than drawing onto the old one, it may be shared
+        damaged = self.sheet.copy()
+        frame_mask(sprite.sheet, tuple(sprite.rect)).to_surface(
+            damaged, setcolor=(0, 0, 0), unsetcolor=None, dest=(
                 sprite.position[0] - self.position[0],
                 sprite.position[1] - self.position[1]
-            ), sprite.rect
+            )
         )
-        pixels = pygame.PixelArray(self.surf.convert())
-        pixels.replace((255, 0, 0), (0, 0, 0))
-        self.sheet = pixels.make_surface()
+        self.sheet = damaged
 
 
 class Bullet(Sprite):
@@ -253,7 +210,6 @@ class Bullet(Sprite):
         self.rect = pygame.Rect((projectile*4*3, 0, 3, 8))
         if self.is_player_owned:
             self.rect = pygame.Rect((14*3, 0, 3, 8))
-        self.surf = pygame.Surface(self.rect.size)
         self._projectile = projectile
         self.explode_frame = 0
         self._move_frame = 0
@@ -288,7 +244,6 @@ class Bullet(Sprite):
             else:
                 self.rect = pygame.Rect((3*15, 0, 0 if hidden else 8, 8))
                 self.position = (self.position[0]-2, self.position[1])
-            self.surf = pygame.Surface(self.rect.size)
 
         self.explode_frame += 1
         return self.explode_frame == 15
@@ -304,7 +259,6 @@ class Font(Sprite):
         """Initialize the Font."""
         super().__init__('font.png')
         self.rect = None
-        self.surf = None
         self._font_map = [
             'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm',
             'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z',
@@ -317,7 +271,7 @@ class Font(Sprite):
         position=(0, 0), relative=False, text=""
     ):
         self.rect = pygame.Rect((0, 0, len(text)*8, 8))
-        self.surf = pygame.Surface(self.rect.size)
+        self.place(position, relative)
 
         for i, letter in enumerate(text):
             letter = letter.lower()
@@ -328,5 +282,8 @@ class Font(Sprite):
                 continue
             letter_x = letter_pos % (self.sheet.get_width() // 8)
             letter_rect = pygame.Rect(letter_x * 8, 0, 8, 8)
-            self.surf.blit(self.sheet, (i * 8, 0), letter_rect)
-        super().draw(surf, position, relative)
+            surf.blit(
+                self.sheet,
+                (self.position[0] + i * 8, self.position[1]),
+                letter_rect
+            )
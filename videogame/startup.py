@@ -0,0 +1,69 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Timing of the startup phases of the game."""
+
+import contextlib
+import threading
+import time
+
+# taken as early as possible, so imports done before the game object
+# exists still show up in the report
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfile:
+    """Records how long each startup phase took."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._phases = []
+        self._lock = threading.Lock()
+        self._last = PROCESS_START
+        self._reported = False
+        self.add("python imports", PROCESS_START, time.perf_counter())
+
+    def add(self, name, start, end):
+        """Record a phase that ran from start to end"""
+        with self._lock:
+            phase = (name, start - PROCESS_START, end - start)
+            self._phases.append(phase)
+            if threading.current_thread() is threading.main_thread():
+                self._last = max(self._last, end)
+        # phases running in the background may finish after the report
+        if self.enabled and self._reported:
+            print(_format(*phase))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the body of the with statement as a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Record a phase from the end of the last phase until now"""
+        self.add(name, self._last, time.perf_counter())
+
+    def report(self):
+        """Return the startup report as text"""
+        with self._lock:
+            phases = sorted(self._phases, key=lambda phase: phase[1])
+        lines = [f"{'phase':<28}{'start ms':>10}{'took ms':>10}"]
+        lines.extend(_format(*phase) for phase in phases)
+        return '\n'.join(lines)
+
+    def finish(self):
+        """Mark the first scene frame and print the report once,
+        if profiling was asked for"""
+        if self.enabled and not self._reported:
+            self.mark("first scene frame")
+            self._reported = True
+            print(self.report())
+
+
+def _format(name, start, took):
+    """Format one phase as a line of the report"""
+    return f"{name:<28}{start*1000:>10.1f}{took*1000:>10.1f}"
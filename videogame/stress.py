@@ -0,0 +1,206 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""A stress test that grows the game far past what the cabinet had.
+
+The formation grows from the 11x5 of the cabinet up to the size asked
+for, in even steps of its alien count, and the bullets and shields grow
+along with it. Every size is played for a number of frames on a world
+wide enough for the formation, with the time update_scene spends in
+each of its phases and the time drawing takes added up per frame. Once
+every size is done the costs are printed per size, with how fast each
+grows with the number of things on screen.
+
+The rows of a formation taller than the cabinet's are packed closer
+together, the playfield only has so much height. The cannon is hidden
+so it is never hit, a hit stops the game for a second. Like in the game
+itself, a frame where a bullet hits an alien, or an alien is still
+blowing up, ends before the formation moves, so with many bullets the
+formation is seldom moved at all.
+"""
+
+import math
+import random
+import time
+
+import pygame
+
+from videogame.scene import InvadersGameScene
+from videogame.sound import Sound
+from videogame.sprites import Bullet
+from videogame.waves import CLASSIC, Wave
+
+PHASES = ("collision", "movement", "shields", "other", "drawing")
+# the formation of the cabinet, where every stress test starts
+CABINET = (11, 5)
+# frames played before the costs are counted
+WARMUP = 10
+# room left and right of the formation, and the height it has to fit in
+MARGIN = 24
+FORMATION_HEIGHT = 120
+# where bullets are put in, between the formation and the ground
+ALIEN_SHOTS_FROM = (150, 230)
+PLAYER_SHOTS_FROM = (40, 211)
+
+
+class PhaseTimer:
+    """Adds up the time spent in each phase it is told about"""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        self._phase = None
+        self._since = 0.0
+
+    def enter(self, name):
+        """Count the time since the last phase began to it, and begin
+        name, or nothing if name is None"""
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.totals[self._phase] += now - self._since
+        self._phase = name
+        self._since = now
+
+    def reset(self):
+        """Forget the time counted so far"""
+        self.totals = dict.fromkeys(PHASES, 0.0)
+
+
+def sizes(largest, steps):
+    """Return the formations from the cabinet's up to largest, evenly
+    spread over the number of aliens"""
+    if steps < 2:
+        return [largest]
+    return [
+        tuple(
+            round(start * (end / start) ** (step / (steps - 1)))
+            for start, end in zip(CABINET, largest)
+        )
+        for step in range(steps)
+    ]
+
+
+def stress_wave(columns, rows, shields, shots):
+    """Return a wave of columns by rows aliens with shields shields
+    and shots bullets"""
+    width = max(224, columns * 16 + MARGIN * 2)
+    species = CLASSIC["rows"]
+    spacing = max(1, (width - MARGIN * 2) // max(shields, 1))
+    definition = dict(
+        CLASSIC,
+        rows=tuple(species[row * len(species) // rows] for row in range(rows)),
+        columns=columns,
+        left=MARGIN,
+        spacing=(16, max(1, min(16, FORMATION_HEIGHT // rows))),
+        heights=(CLASSIC["heights"][0],),
+        shots=(shots,),
+        shields=shields,
+        shield_left=MARGIN + max(0, spacing - 24) // 2,
+        shield_spacing=spacing,
+    )
+    return Wave(definition), width
+
+
+def measure(wave, width, bullets, frames, rng):
+    """Play a wave on a world width wide for frames frames, return the
+    milliseconds each phase took per frame"""
+    world = pygame.Surface((width, 256))
+    scene = InvadersGameScene(world)
+    scene.wave = wave
+    scene.rng = random.Random(rng.getrandbits(32))
+    # no collision with a cannon that has no pixels
+    scene.player.rect = pygame.Rect(0, 0, 0, 0)
+    timer = PhaseTimer()
+    scene.enter_phase = timer.enter
+    played = 0
+    for frame in range(WARMUP + frames):
+        if frame == WARMUP:
+            timer.reset()
+            played = 0
+        _top_up(scene, bullets, width, rng)
+        timer.enter("other")
+        scene.update_scene()
+        timer.enter("drawing")
+        scene.draw()
+        scene.render_updates()
+        timer.enter(None)
+        played += 1
+        if not scene.is_valid():
+            break
+    return {
+        phase: total * 1000 / max(played, 1)
+        for phase, total in timer.totals.items()
+    }
+
+
+def _top_up(scene, bullets, width, rng):
+    """Put in bullets of each side until there are as many as asked"""
+    alien = sum(not bullet.is_player_owned for bullet in scene.bullets)
+    player = len(scene.bullets) - alien
+    for _ in range(bullets - alien):
+        scene.bullets.append(Bullet((
+            rng.randrange(MARGIN, width - MARGIN),
+            rng.randrange(*ALIEN_SHOTS_FROM)
+        ), rng.randrange(3)))
+    for _ in range(bullets - player):
+        scene.bullets.append(Bullet((
+            rng.randrange(MARGIN, width - MARGIN),
+            rng.randrange(*PLAYER_SHOTS_FROM)
+        ), is_player_owned=True))
+
+
+def workloads(options):
+    """Yield the formation, bullets of each side and shields of every
+    size the options ask for. Bullets and shields grow with the
+    formation."""
+    largest = options.stress
+    aliens = largest[0] * largest[1]
+    most_bullets = options.stress_bullets \
+        or max(1, aliens // (CABINET[0] * CABINET[1]))
+    most_shields = options.stress_shields or max(4, 4 * largest[0] // 11)
+    for columns, rows in sizes(largest, options.stress_steps):
+        yield (
+            columns, rows,
+            max(1, round(most_bullets * columns * rows / aliens)),
+            max(1, round(most_shields * columns / largest[0]))
+        )
+
+
+def run(options):
+    """Run the stress test of the options, print the costs"""
+    rng = random.Random(0)
+    InvadersGameScene.animate_waves = False
+    Sound.muted = True
+
+    print(
+        f"{'size':>9} {'aliens':>6} {'bullets':>7} {'shields':>7} "
+        + ' '.join(f"{phase:>9}" for phase in PHASES)
+        + f" {'total':>9}   ms per frame"
+    )
+    results = []
+    for columns, rows, bullets, shields in workloads(options):
+        wave, width = stress_wave(columns, rows, shields, bullets)
+        costs = measure(wave, width, bullets, options.stress_frames, rng)
+        costs["total"] = sum(costs.values())
+        results.append((columns * rows + bullets * 2 + shields, costs))
+        print(
+            f"{columns:>4}x{rows:<4} {columns * rows:>6} "
+            f"{bullets * 2:>7} {shields:>7} "
+            + ' '.join(
+                f"{costs[phase]:>9.3f}" for phase in PHASES + ("total",)
+            )
+        )
+    _print_growth(results)
+
+
+def _print_growth(results):
+    """Print how fast each cost grew from the smallest size to the
+    largest, as the power of the number of things on screen"""
+    if len(results) < 2:
+        return
+    (first, first_costs), (last, last_costs) = results[0], results[-1]
+    print(f"growth with things on screen, {first} to {last}:")
+    for phase, before in first_costs.items():
+        after = last_costs[phase]
+        if before > 0 and after > 0:
+            power = math.log(after / before) / math.log(last / first)
+            print(f"  {phase:<10} n^{power:.2f}")
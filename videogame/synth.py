@@ -0,0 +1,137 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Tone generator for the sound effects, in place of the sound files.
+
+The original cabinet made its sounds with discrete circuits instead of
+samples. This module approximates them with NumPy: every sound is
+computed as an array of samples in the format the mixer runs at, and
+handed to the mixer without touching the disk. Each parameter set is
+only ever computed once.
+"""
+
+import functools
+
+import numpy
+import pygame
+
+# the four descending notes of the march, in Hz
+MARCH_NOTES = (98.0, 87.3, 82.4, 73.4)
+# march timing in frames with a full and an empty fleet
+MARCH_SLOWEST = 60
+MARCH_FASTEST = 5
+
+
+def sound(name, *params):
+    """Return the mixer sound of a generator, made once per parameter set"""
+    return _sound(pygame.mixer.get_init(), name, params)
+
+
+@functools.lru_cache(maxsize=None)
+def _sound(mixer_format, name, params):
+    """Generate a sound for a mixer format"""
+    frequency, sample_format, channels = mixer_format
+    wave = GENERATORS[name](frequency, *params)
+    return pygame.mixer.Sound(
+        buffer=_pcm(wave, sample_format, channels)
+    )
+
+
+def _pcm(wave, sample_format, channels):
+    """Convert samples between -1 and 1 to interleaved mixer samples"""
+    # pygame only opens 32 bit audio as floats, which it reports as -32
+    if abs(sample_format) == 32:
+        samples = wave.astype(numpy.float32)
+    else:
+        bits = abs(sample_format)
+        peak = 2 ** (bits - 1) - 1
+        samples = numpy.round(wave * peak)
+        if sample_format > 0:
+            samples += peak + 1
+        kind = 'i' if sample_format < 0 else 'u'
+        samples = samples.astype(f"{kind}{bits // 8}")
+    # one sample per channel per frame, every channel plays the same
+    return numpy.repeat(samples, channels)
+
+
+def _time(rate, seconds):
+    """Return the time of every sample over a number of seconds"""
+    return numpy.arange(int(rate * seconds)) / rate
+
+
+def _phase(rate, frequencies):
+    """Return the phase of an oscillator following frequencies"""
+    return numpy.cumsum(frequencies) / rate
+
+
+def _square(phase):
+    """Square wave, the tone of the cabinet"""
+    return numpy.where(phase % 1.0 < 0.5, 1.0, -1.0)
+
+
+def _noise(count, hold=1, seed=0):
+    """White noise, held for hold samples to lower its pitch"""
+    rng = numpy.random.default_rng(seed)
+    noise = rng.uniform(-1.0, 1.0, -(-count // hold))
+    return numpy.repeat(noise, hold)[:count]
+
+
+def _fade(wave, rate, seconds=0.005):
+    """Fade out the last samples so a sound does not end in a click"""
+    count = min(len(wave), int(rate * seconds))
+    if count:
+        wave[-count:] *= numpy.linspace(1.0, 0.0, count)
+    return wave
+
+
+def march(rate, note, timing):
+    """One note of the marching fleet. The fewer aliens, the shorter the
+    timing, and the higher and shorter the note."""
+    speed = (MARCH_SLOWEST - min(max(timing, MARCH_FASTEST), MARCH_SLOWEST)) \
+        / (MARCH_SLOWEST - MARCH_FASTEST)
+    time = _time(rate, 0.12 - 0.05 * speed)
+    frequency = MARCH_NOTES[note % len(MARCH_NOTES)] * (1.0 + 0.5 * speed)
+    wave = _square(time * frequency) * numpy.exp(-time * 18.0)
+    return _fade(0.5 * wave, rate)
+
+
+def shot(rate):
+    """The laser of the player, a falling tone over a hiss"""
+    time = _time(rate, 0.25)
+    frequencies = numpy.geomspace(1400.0, 180.0, len(time))
+    wave = 0.7 * _square(_phase(rate, frequencies)) \
+        + 0.3 * _noise(len(time), seed=1)
+    return _fade(0.35 * wave * numpy.exp(-time * 9.0), rate)
+
+
+def explosion(rate):
+    """An alien being hit, a short burst of noise"""
+    time = _time(rate, 0.3)
+    wave = _noise(len(time), hold=max(rate // 6000, 1), seed=2)
+    return _fade(0.5 * wave * numpy.exp(-time * 14.0), rate)
+
+
+def death(rate):
+    """The player being hit, a long low rumble"""
+    time = _time(rate, 1.0)
+    wave = _noise(len(time), hold=max(rate // 1500, 1), seed=3)
+    wave *= 0.75 + 0.25 * _square(time * 12.0)
+    return _fade(0.6 * wave * numpy.exp(-time * 3.5), rate)
+
+
+def extra_life(rate):
+    """A new life, four rising notes"""
+    notes = []
+    for frequency in (523.3, 659.3, 784.0, 1046.5):
+        time = _time(rate, 0.08)
+        notes.append(_square(time * frequency) * numpy.exp(-time * 12.0))
+    return _fade(0.3 * numpy.concatenate(notes), rate)
+
+
+GENERATORS = {
+    'march': march,
+    'shot': shot,
+    'explosion': explosion,
+    'death': death,
+    'extra_life': extra_life,
+}
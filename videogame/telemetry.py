@@ -0,0 +1,303 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""What happens on a cabinet, kept as compact binary records.
+
+    python -m videogame.telemetry DIR
+
+Every event is a fixed-width record, the frame it happened on, its
+kind, a small detail and a value, packed into a preallocated buffer.
+Recording one is a struct pack under a lock, a microsecond or so, and
+the game never touches a file. A writer thread swaps the buffer for a
+spare one every few seconds, or sooner once it is half full, and
+appends what was recorded to the current file. Files are rotated once
+they reach a size, the oldest are removed past a number of them, and
+every file is listed in an index with the session it belongs to.
+
+The timing of frames is summed up every second instead of being kept
+frame by frame, as the mean and the longest work of a frame, everything
+from one tick of the clock to the next. Records that come while both
+buffers are full are dropped and counted.
+
+Run as a module it prints what each session in DIR played, load()
+returns every record as a NumPy array.
+"""
+
+import argparse
+import collections
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy
+
+# kinds of records, with what their detail and value are
+KILL = 1  # species, points
+DEATH = 2  # lives left, score
+WAVE = 3  # level cleared, score
+EXTRA_LIFE = 4  # lives, score
+SHOT = 5  # nothing, score
+FRAME_MEAN = 6  # frames summed up, mean microseconds of work
+FRAME_MAX = 7  # frames summed up, most microseconds of work
+SESSION = 8  # nothing, seconds the session lasted
+# the detail of a kill
+SPECIES = ("Squid", "Crab", "Octopus", "Cuttlefish")
+
+# frame, kind, detail, value, and the same as a NumPy record
+RECORD = struct.Struct("<IHHi")
+RECORD_DTYPE = numpy.dtype([
+    ("frame", "<u4"), ("kind", "<u2"), ("detail", "<u2"), ("value", "<i4")
+])
+# magic, version, size of a record and when the session started, in
+# milliseconds since the epoch
+HEADER = struct.Struct("<4sHHq")
+MAGIC = b"SITL"
+VERSION = 1
+INDEX = "index.txt"
+
+# records each buffer holds, seconds between flushes, bytes a file
+# grows to before the next one is started, and files kept
+CAPACITY = 4096
+FLUSH_INTERVAL = 5.0
+ROTATE_BYTES = 1 << 20
+KEEP_FILES = 64
+# frames summed up in a timing record
+SUMMARY_FRAMES = 60
+
+
+# I know what I'm doing, linter.
+# pylint: disable-next=too-many-instance-attributes
+class Telemetry:
+    """Stands in for the clock, counting frames and timing their work,
+    and records the events of the game for a writer thread"""
+
+    def __init__(self, directory, clock, capacity=CAPACITY):
+        self.directory = directory
+        self.frames = 0
+        self.recorded = 0
+        self.dropped = 0
+        self._clock = clock
+        self._session = time.time_ns() // 1_000_000
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._active = bytearray(capacity * RECORD.size)
+        self._spare = bytearray(capacity * RECORD.size)
+        self._used = 0
+        # work of the frames of the summary so far
+        self._started = None
+        self._timed = 0
+        self._work = 0.0
+        self._longest = 0.0
+        self._files = _RotatingFiles(directory, self._session)
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write, name="telemetry", daemon=True
+        )
+        self._writer.start()
+
+    def tick(self, framerate=0):
+        """Time the frame that just ended, then wait for the next one
+        like the clock does"""
+        if self._started is not None and framerate:
+            work = time.perf_counter() - self._started
+            self._timed += 1
+            self._work += work
+            self._longest = max(self._longest, work)
+            if self._timed == SUMMARY_FRAMES:
+                self.record(FRAME_MEAN, self._timed,
+                            int(self._work / self._timed * 1e6))
+                self.record(FRAME_MAX, self._timed, int(self._longest * 1e6))
+                self._timed = 0
+                self._work = 0.0
+                self._longest = 0.0
+        took = self._clock.tick(framerate)
+        self.frames += 1
+        self._started = time.perf_counter()
+        return took
+
+    def record(self, kind, detail=0, value=0):
+        """Record an event of the current frame, or count it as dropped
+        when there is no room left for it"""
+        with self._lock:
+            if self._used == len(self._active):
+                self.dropped += 1
+                return
+            RECORD.pack_into(
+                self._active, self._used, self.frames, kind, detail, value
+            )
+            self._used += RECORD.size
+            self.recorded += 1
+            if self._used * 2 >= len(self._active):
+                self._wake.set()
+
+    def close(self):
+        """Record how long the session lasted and write out the rest"""
+        self.record(SESSION, 0, int(time.perf_counter() - self._start))
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        print(f"Telemetry: {self.recorded} records written to "
+              f"{self.directory}, {self.dropped} dropped")
+
+    def _write(self):
+        """Write out what was recorded now and then, until closed"""
+        while True:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            closed = self._closed
+            self._flush()
+            if closed:
+                self._files.close()
+                return
+
+    def _flush(self):
+        """Swap the buffers and write out the one that was recorded to"""
+        with self._lock:
+            full, used = self._active, self._used
+            self._active, self._spare = self._spare, full
+            self._used = 0
+        if used:
+            self._files.write(memoryview(full)[:used])
+
+
+class _RotatingFiles:
+    """Numbered files of records, started anew once one grows too big
+    and listed in the index"""
+
+    def __init__(self, directory, session):
+        self._directory = directory
+        self._session = session
+        os.makedirs(directory, exist_ok=True)
+        self._number = max((number for number, _ in _index(directory)),
+                           default=0)
+        self._file = None
+        self._size = 0
+
+    def write(self, data):
+        """Append data to the current file, starting one first if it is
+        due"""
+        if self._file is None or self._size >= ROTATE_BYTES:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self):
+        """Close the current file, if one was started"""
+        if self._file is not None:
+            self._file.close()
+
+    def _rotate(self):
+        """Start the next file, list it and remove those past keeping"""
+        self.close()
+        self._number += 1
+        name = _file_name(self._number)
+        # pylint: disable-next=consider-using-with
+        self._file = open(os.path.join(self._directory, name), "wb")
+        self._file.write(
+            HEADER.pack(MAGIC, VERSION, RECORD.size, self._session)
+        )
+        self._size = HEADER.size
+        with open(os.path.join(self._directory, INDEX), "a",
+                  encoding="ascii") as index:
+            index.write(f"{name} {self._session}\n")
+        old = os.path.join(
+            self._directory, _file_name(self._number - KEEP_FILES)
+        )
+        if os.path.exists(old):
+            os.remove(old)
+
+
+def _file_name(number):
+    """Return the name of file number"""
+    return f"telemetry-{number:06}.bin"
+
+
+def _index(directory):
+    """Return the number and session of every file listed in the index
+    of directory, oldest first"""
+    try:
+        with open(os.path.join(directory, INDEX), encoding="ascii") as index:
+            lines = [line.split() for line in index if line.strip()]
+    except FileNotFoundError:
+        return []
+    return [
+        (int(name[len("telemetry-"):-len(".bin")]), int(session))
+        for name, session in lines
+    ]
+
+
+def load(directory):
+    """Return every record of the files in directory as one NumPy array,
+    oldest first, with the session of each record next to it"""
+    dtype = numpy.dtype([("session", "<i8")] + RECORD_DTYPE.descr)
+    parts = []
+    for number, session in _index(directory):
+        path = os.path.join(directory, _file_name(number))
+        if not os.path.exists(path):
+            # rotated away
+            continue
+        with open(path, "rb") as file:
+            magic, version, size, _ = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION or size != RECORD.size:
+                raise ValueError(f"{path} is not a telemetry file")
+            records = numpy.fromfile(file, RECORD_DTYPE)
+        part = numpy.empty(len(records), dtype)
+        part["session"] = session
+        for name in RECORD_DTYPE.names:
+            part[name] = records[name]
+        parts.append(part)
+    return numpy.concatenate(parts) if parts else numpy.empty(0, dtype)
+
+
+def summary(records):
+    """Return what each session of records played as lines of text"""
+    lines = []
+    for session in numpy.unique(records["session"]):
+        played = records[records["session"] == session]
+        counts = collections.Counter(played["kind"].tolist())
+        kills = played[played["kind"] == KILL]
+        species = ", ".join(
+            f"{name} {numpy.count_nonzero(kills['detail'] == index)}"
+            for index, name in enumerate(SPECIES)
+        )
+        means = played["value"][played["kind"] == FRAME_MEAN]
+        longest = played["value"][played["kind"] == FRAME_MAX]
+        length = played["value"][played["kind"] == SESSION]
+        started = time.strftime(
+            "%Y-%m-%d %H:%M:%S", time.localtime(session / 1000)
+        )
+        lines.append(
+            f"{started}  {length[0] if len(length) else '?'} s"
+            f"  {counts[SHOT]} shots, {len(kills)} kills ({species}), "
+            f"{int(kills['value'].sum())} points, {counts[DEATH]} deaths, "
+            f"{counts[WAVE]} waves, {counts[EXTRA_LIFE]} extra lives"
+        )
+        if len(means):
+            lines.append(
+                f"    frame work us mean {means.mean():.0f}"
+                f"  longest {longest.max()}"
+            )
+    return lines
+
+
+def main(argv=None):
+    """Print what each session kept in a directory played"""
+    parser = argparse.ArgumentParser(
+        prog="python -m videogame.telemetry",
+        description="Print what the sessions of a telemetry directory played"
+    )
+    parser.add_argument("directory", help="the --telemetry directory")
+    options = parser.parse_args(argv)
+    records = load(options.directory)
+    print(f"{len(records)} records")
+    for line in summary(records):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
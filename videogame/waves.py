@@ -0,0 +1,127 @@
+# Jimmy Quach
+# jminquach@csu.fullerton.edu
+# @lulzsun
+"""Wave definitions, and the formations they are compiled into.
+
+A definition says what a wave looks like: the species of each row from
+the top, how many columns and how far apart, how low the formation
+starts on each level, how many bullets the aliens may have on screen
+on each level and where the shields go. It is compiled once, when the
+game starts, into a formation per level with the class, position and
+grid position of every alien worked out, so a wave is spawned in one
+step by just calling the classes.
+"""
+
+from videogame.sprites import Crab, Octopus, Shield, Squid
+
+SPECIES = {
+    "squid": Squid,
+    "crab": Crab,
+    "octopus": Octopus,
+}
+
+# the wave of the cabinet, the last level listed is used for every
+# level after it
+CLASSIC = {
+    "rows": ("squid", "crab", "crab", "octopus", "octopus"),
+    "columns": 11,
+    # from the left edge of the screen to the first column
+    "left": 24,
+    # between columns, and between rows
+    "spacing": (16, 16),
+    # of the top row, per level
+    "heights": (64,),
+    # alien bullets on screen at once, per level
+    "shots": (1,),
+    "shields": 4,
+    "shield_left": 31,
+    "shield_spacing": 24 + 22,
+    "shield_height": 192,
+}
+
+# the same wave getting harder, every level starts a step lower down to
+# three steps and the aliens fire 2 and then 3 bullets at once
+DESCENDING = dict(
+    CLASSIC,
+    heights=(64, 80, 88, 96, 96, 96, 104, 104, 104),
+    shots=(1, 1, 1, 2, 2, 2, 3, 3, 3),
+)
+
+
+class Wave:
+    """A wave definition compiled into what it spawns"""
+
+    def __init__(self, definition):
+        """Compile a wave definition"""
+        width, height = definition["spacing"]
+        self.species = tuple(SPECIES[name] for name in definition["rows"])
+        self.columns = definition["columns"]
+        self.formations = tuple(
+            tuple(
+                tuple(
+                    (
+                        species,
+                        (definition["left"] + column * width,
+                         top + row * height),
+                        (column, row)
+                    )
+                    for column in range(self.columns)
+                )
+                for row, species in enumerate(self.species)
+            )
+            for top in definition["heights"]
+        )
+        self.shots = tuple(definition["shots"])
+        self.shields = tuple(
+            (
+                definition["shield_left"]
+                + shield * definition["shield_spacing"],
+                definition["shield_height"]
+            )
+            for shield in range(definition["shields"])
+        )
+        # the bottom alien of every column fires first
+        self.line_of_sight = tuple(
+            (column, len(self.species) - 1) for column in range(self.columns)
+        )
+        # loading shows one thing a frame and takes one more to finish
+        self.loading_frames = (
+            len(self.shields) + len(self.species) * self.columns + 1
+        )
+
+    def spawn(self, level):
+        """Return the rows of aliens and the shields of a level"""
+        formation = self.formations[min(level, len(self.formations) - 1)]
+        aliens = [
+            [species(position, grid) for species, position, grid in row]
+            for row in formation
+        ]
+        return aliens, [Shield(position) for position in self.shields]
+
+    def shots_at(self, level):
+        """Return how many bullets the aliens may have on screen"""
+        return self.shots[min(level, len(self.shots) - 1)]
+
+    def shown(self, frame):
+        """Return how many shields, and how many aliens of each row,
+        loading has shown by frame. Shields come first, then the rows
+        from the bottom up, left to right."""
+        shields = min(frame, len(self.shields))
+        frame -= shields
+        rows = [0] * len(self.species)
+        for row in reversed(range(len(self.species))):
+            rows[row] = min(frame, self.columns)
+            frame -= rows[row]
+        return shields, rows
+
+
+CLASSIC_WAVE = Wave(CLASSIC)
+# the waves to pick from with --waves
+WAVES = {
+    "classic": CLASSIC_WAVE,
+    "descending": Wave(DESCENDING),
+}
+# the wave games play, classic unless another was picked
+# I know what I'm doing, linter.
+# pylint: disable-next=invalid-name
+played = CLASSIC_WAVE